@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Caliper-python benchmarks, binary encodings
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+"""
+Time and peak traced memory of encoding the fixture envelopes, and of decoding
+and condensing them again, as JSON and in each installed binary format; and
+the total size of the encoded envelopes.
+
+    python benchmarks/bench_binary.py [--fixtures DIR]
+"""
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+from common import get_arguments, load_envelopes, measure_peak, report, time_call
+
+import caliper.condensor as condensor
+from caliper.binaryformat import _FORMATS
+
+
+def encode(envelopes, name):
+    return [getattr(e, 'as_{0}'.format(name))(thin_context=True, thin_props=True) for e in envelopes]
+
+
+def decode(payloads, name):
+    for p in payloads:
+        getattr(condensor, 'from_{0}'.format(name))(p)
+
+
+def main():
+    args = get_arguments(__doc__)
+    envelopes = load_envelopes(args.fixtures)
+    print('{0} envelopes'.format(len(envelopes)))
+    rows = []
+    sizes = []
+    for name in ['json'] + [f.name for f in _FORMATS if f.available()]:
+        payloads = encode(envelopes, name)
+        sizes.append((name, sum(len(p) for p in payloads)))
+        for label, call in [('{0} encode'.format(name), lambda: encode(envelopes, name)),
+                            ('{0} decode'.format(name), lambda: decode(payloads, name))]:
+            rows.append((label, time_call(call, args.number, args.repeat), measure_peak(call)))
+    report(rows)
+    print()
+    for name, size in sizes:
+        print('{0}  {1:>12} bytes'.format(name.ljust(8), size))
+
+
+if __name__ == '__main__':
+    main()
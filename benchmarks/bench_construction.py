@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Caliper-python benchmarks, event construction
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+"""
+Time and peak traced memory of building the events and entities of the
+fixture corpus from their JSON dicts, which runs every property's type and
+value checks.
+
+    python benchmarks/bench_construction.py [--fixtures DIR]
+"""
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+from common import get_arguments, load_fixture_dicts, measure_peak, report, time_call
+
+import caliper.condensor as condensor
+
+
+def construct(dicts):
+    for d in dicts:
+        condensor.from_json_dict(d)
+
+
+def main():
+    args = get_arguments(__doc__)
+    events = []
+    entities = []
+    for d in load_fixture_dicts(args.fixtures):
+        try:
+            condensor.from_json_dict(d)
+        except Exception:
+            continue
+        (events if 'eventTime' in d else entities).append(d)
+    print('{0} events, {1} entities'.format(len(events), len(entities)))
+    rows = []
+    for name, dicts in [('events', events), ('entities', entities)]:
+        call = lambda: construct(dicts)
+        rows.append((name, time_call(call, args.number, args.repeat), measure_peak(call)))
+    report(rows)
+
+
+if __name__ == '__main__':
+    main()
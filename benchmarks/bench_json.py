@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Caliper-python benchmarks, JSON backends
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+"""
+Time and peak traced memory of encoding the fixture envelopes, and of decoding
+and condensing them again, with each installed JSON backend; and of encoding
+them in compact, unsorted form.
+
+    python benchmarks/bench_json.py [--fixtures DIR]
+"""
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+from common import get_arguments, load_envelopes, measure_peak, report, time_call
+
+import caliper.condensor as condensor
+from caliper.jsonbackend import _BACKENDS
+
+
+def encode(envelopes, backend, compact=False, sort_keys=True):
+    return [
+        e.as_json_chunks_with_ids(
+            thin_context=True, thin_props=True, json_backend=backend, compact=compact,
+            sort_keys=sort_keys) for e in envelopes
+    ]
+
+
+def decode(payloads, backend):
+    for chunks in payloads:
+        for payload, ids, count in chunks:
+            condensor.from_json(payload, json_backend=backend)
+
+
+def main():
+    args = get_arguments(__doc__)
+    envelopes = load_envelopes(args.fixtures)
+    print('{0} envelopes'.format(len(envelopes)))
+    rows = []
+    for b in [b for b in _BACKENDS if b.available()]:
+        payloads = encode(envelopes, b.name)
+        for name, call in [('{0} encode'.format(b.name), lambda: encode(envelopes, b.name)),
+                           ('{0} encode compact'.format(b.name),
+                            lambda: encode(envelopes, b.name, compact=True, sort_keys=False)),
+                           ('{0} decode'.format(b.name), lambda: decode(payloads, b.name))]:
+            rows.append((name, time_call(call, args.number, args.repeat), measure_peak(call)))
+    report(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Caliper-python benchmarks, serialization
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+"""
+Time and peak traced memory of serializing the fixture corpus to JSON: with
+and without copying property values into the unpacked dicts, streamed
+straight into a reused buffer, and against a large index of described
+objects.
+
+    python benchmarks/bench_serialization.py [--fixtures DIR]
+"""
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+import json
+
+from common import get_arguments, load_corpus, measure_peak, report, time_call
+
+import caliper
+
+
+def serialize_copying(corpus):
+    for o in corpus:
+        json.dumps(o.as_dict(thin_context=True, thin_props=True, copy_values=True), sort_keys=True)
+
+
+def serialize(corpus):
+    for o in corpus:
+        o.as_json(thin_context=True, thin_props=True)
+
+
+def serialize_streaming(corpus):
+    buf = bytearray()
+    for o in corpus:
+        del buf[:]
+        o.write_json(buf, thin_context=True, thin_props=True)
+
+
+def serialize_described(corpus, described):
+    for o in corpus:
+        o.as_json(described_objects=described, thin_context=True, thin_props=True)
+
+
+def main():
+    args = get_arguments(__doc__)
+    corpus = load_corpus(args.fixtures)
+    print('{0} fixtures'.format(len(corpus)))
+    rows = []
+    for name, func in [('copy_values', serialize_copying), ('as_json', serialize),
+                       ('write_json', serialize_streaming)]:
+        call = lambda: func(corpus)
+        rows.append((name, time_call(call, args.number, args.repeat), measure_peak(call)))
+    described = caliper.DescribedIndex(
+        'https://example.edu/described/{0}'.format(i) for i in range(10000))
+    call = lambda: serialize_described(corpus, described)
+    rows.append(('described', time_call(call, args.number, args.repeat), measure_peak(call)))
+    report(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Caliper-python benchmarks, shared helpers
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+import argparse, gc, json, os, sys, timeit, tracemalloc
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHDIR))
+
+import caliper.condensor as condensor
+import caliper.request
+
+# same location the unit tests read the caliper fixtures repo from
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(BENCHDIR), 'tests', 'fixtures', 'src', 'test', 'resources', 'fixtures')
+
+
+def get_arguments(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--fixtures', default=FIXTURE_DIR, help='directory of caliper JSON fixtures')
+    parser.add_argument(
+        '--number', type=int, default=20, help='passes over the corpus per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs; the best is reported')
+    return parser.parse_args()
+
+
+# the JSON dicts of every event and entity fixture
+def load_fixture_dicts(fixture_dir):
+    r = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.startswith(('caliperEvent', 'caliperEntity')) and name.endswith('.json'):
+            with open(os.path.join(fixture_dir, name), 'r') as f:
+                r.append(json.load(f))
+    return r
+
+
+# the events and entities built from every fixture the condensor can read
+def load_corpus(fixture_dir):
+    r = []
+    for d in load_fixture_dicts(fixture_dir):
+        try:
+            r.append(condensor.from_json_dict(d))
+        except Exception:
+            pass
+    return r
+
+
+# the envelopes built from every envelope fixture
+def load_envelopes(fixture_dir):
+    r = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.startswith('caliperEnvelope') and name.endswith('.json'):
+            with open(os.path.join(fixture_dir, name), 'r') as f:
+                d = json.load(f)
+            try:
+                data = condensor.from_json_list(d.get('data'))
+            except Exception:
+                continue
+            r.append(caliper.request.Envelope(
+                data=data, send_time=d.get('sendTime'), sensor_id=d.get('sensor')))
+    return r
+
+
+# best time of repeat runs of func, in seconds per call
+def time_call(func, number, repeat):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+# peak bytes traced while func runs
+def measure_peak(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def report(rows):
+    width = max(len(name) for name, _, _ in rows)
+    print('{0}  {1:>12}  {2:>12}'.format('mode'.ljust(width), 'ms/pass', 'peak KiB'))
+    for name, seconds, peak in rows:
+        print('{0}  {1:>12.3f}  {2:>12.1f}'.format(
+            name.ljust(width), seconds * 1000, peak / 1024.0))
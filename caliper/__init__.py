@@ -42,7 +42,10 @@ import logging, os
 
 from caliper.sensor import Sensor as Sensor
 from caliper.base import HttpOptions as HttpOptions
-__all__ = ['Sensor', 'HttpOptions']
+from caliper.base import DescribedIndex as DescribedIndex
+from caliper.base import set_validation_level as set_validation_level
+from caliper.base import validation_level as validation_level
+__all__ = ['Sensor', 'HttpOptions', 'DescribedIndex', 'set_validation_level', 'validation_level']
 
 
 def build_default_sensor(sensor_id=None):
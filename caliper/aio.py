@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, asyncio module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+"""
+asyncio sensor API
+~~~~~~~~~~~~~~~~~~
+
+Non-blocking counterparts to the sensor, client and HTTP requestor, for use from
+applications running on an asyncio event loop. The HTTP transport is built on
+asyncio streams, so it needs no extra dependencies; it does need Python 3.5 or
+later, and so the main caliper package does not import this module.
+"""
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+
+import asyncio, collections, ssl, time
+from urllib.parse import urlsplit
+
+from future.utils import raise_with_traceback
+
+from caliper.base import HttpOptions
+from caliper.entities import Entity
+from caliper.events import Event
+from caliper.request import EventStoreRequestor, PayloadCache, RetryPolicy, logger
+from caliper.sensor import Client, Sensor
+from caliper.util.cache import LRUCache
+
+
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.time()
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHttpRequestor(EventStoreRequestor):
+    _accepts_payload_cache = True
+
+    def __init__(self, options=None, **kwargs):
+        if not options:
+            self._options = HttpOptions()
+        elif not (isinstance(options, HttpOptions)):
+            raise_with_traceback(TypeError('options must implement base.HttpOptions'))
+        else:
+            self._options = options
+        self._idle = collections.deque()
+        if self._options.FRAGMENT_CACHE_SIZE:
+            self._fragment_cache = LRUCache(self._options.FRAGMENT_CACHE_SIZE)
+
+    def _endpoint(self):
+        url = urlsplit(self._options.HOST)
+        secure = (url.scheme == 'https')
+        port = url.port or (443 if secure else 80)
+        path = url.path or '/'
+        if url.query:
+            path = '{0}?{1}'.format(path, url.query)
+        return url.hostname, port, secure, path
+
+    async def _connect(self):
+        # reuse the most recently returned keep-alive connection, discarding any
+        # that have sat idle past the pool's idle timeout
+        idle_timeout = self._options.POOL_IDLE_TIMEOUT / 1000.0
+        while self._idle:
+            conn = self._idle.pop()
+            if idle_timeout and (time.time() - conn.last_used) > idle_timeout:
+                conn.close()
+            else:
+                return conn, True
+        host, port, secure, _ = self._endpoint()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                host, port, ssl=ssl.create_default_context() if secure else None),
+            self._options.CONNECTION_TIMEOUT / 1000.0)
+        return _Connection(reader, writer), False
+
+    def _release(self, conn, keep_alive):
+        if keep_alive and len(self._idle) < self._options.POOL_MAXSIZE:
+            conn.last_used = time.time()
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+    async def _read_response(self, conn):
+        reader = conn.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed before a response was received')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            k, _, v = line.decode('latin-1').partition(':')
+            headers[k.strip().lower()] = v.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            keep_alive = False
+        return status, headers, keep_alive
+
+    async def _post(self, payload):
+        host, port, _, path = self._endpoint()
+        body = payload['data']
+        head = ('POST {0} HTTP/1.1\r\n'
+                'Host: {1}:{2}\r\n'
+                'Authorization: {3}\r\n'
+                'Content-Type: {4}\r\n'
+                'Content-Length: {5}\r\n'
+                'Connection: keep-alive\r\n').format(
+                    path, host, port, self._options.get_auth_header_value(), payload['type'],
+                    len(body))
+        if payload.get('encoding'):
+            head += 'Content-Encoding: {0}\r\n'.format(payload['encoding'])
+        head += '\r\n'
+
+        conn, reused = await self._connect()
+        try:
+            conn.writer.write(head.encode('latin-1') + body)
+            await conn.writer.drain()
+            status, headers, keep_alive = await asyncio.wait_for(
+                self._read_response(conn), self._options.SOCKET_TIMEOUT / 1000.0)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            conn.close()
+            # the endpoint may have closed a pooled connection while it sat idle,
+            # so retry once on a fresh connection before giving up
+            if not reused:
+                raise
+            return await self._post(payload)
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn, keep_alive)
+        return status, headers
+
+    async def _deliver(self, payload, policy):
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                status, headers = await self._post(payload)
+                retry_after = headers.get('retry-after')
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                logger.warning('Caliper envelope delivery failed: {0}'.format(e))
+                status, retry_after = None, None
+            if status in (200, 201):
+                return True
+            delay = policy.next_delay(attempt, status, started, retry_after=retry_after)
+            if delay is None:
+                return False
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _dispatch(self,
+                        caliper_objects=None,
+                        described_objects=None,
+                        sensor_id=None,
+                        payload_cache=None):
+        results = []
+        identifiers = []
+
+        if isinstance(caliper_objects, collections.MutableSequence):
+            policy = RetryPolicy.from_options(self._options)
+            for payload, ids, count in self._payloads(caliper_objects, described_objects,
+                                                      sensor_id, payload_cache):
+                v = await self._deliver(payload, policy)
+                if v:
+                    identifiers += ids
+                results += count * [v]
+
+        return results, identifiers
+
+    async def describe(self, caliper_entity_list=None, sensor_id=None, payload_cache=None):
+        results, ids = await self._dispatch(
+            caliper_objects=caliper_entity_list, sensor_id=sensor_id, payload_cache=payload_cache)
+        return results, ids
+
+    async def send(self,
+                   caliper_event_list=None,
+                   described_objects=None,
+                   sensor_id=None,
+                   payload_cache=None):
+        results, ids = await self._dispatch(
+            caliper_objects=caliper_event_list,
+            described_objects=described_objects,
+            sensor_id=sensor_id,
+            payload_cache=payload_cache)
+        return results, ids
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+class AsyncClient(Client):
+    def __init__(self, config_options=None, requestor=None, stats=None, fallback=None, **kwargs):
+        if config_options is None:
+            config_options = HttpOptions()
+        Client.__init__(
+            self,
+            config_options=config_options,
+            requestor=requestor or AsyncHttpRequestor(options=config_options),
+            stats=stats,
+            fallback=fallback)
+        # the event loop already keeps sends off the caller's critical path
+        self._dispatcher = None
+
+    async def _request(self, method, objects, payload_cache=None, **kwargs):
+        breaker = self._breaker
+        if breaker and not breaker.allow():
+            self._stats.update_rejected(len(objects))
+            if self._fallback:
+                return await getattr(self._fallback, method)(**kwargs)
+            return len(objects) * [False], []
+
+        if payload_cache and self._requestor._accepts_payload_cache:
+            kwargs['payload_cache'] = payload_cache
+        started = time.time()
+        try:
+            results, identifiers = await getattr(self._requestor, method)(**kwargs)
+        except Exception:
+            if breaker:
+                breaker.record(False, time.time() - started)
+            raise
+        if breaker:
+            breaker.record(all(results), time.time() - started)
+        return results, identifiers
+
+    async def describe(self, entities=None, sensor_id=None):
+        return await self._describe(entities, sensor_id=sensor_id)
+
+    async def _describe(self, entities, sensor_id=None, payload_cache=None):
+        identifiers = None
+        if self._ensure_list_type(entities, Entity, payload_cache):
+            results, identifiers = await self._request(
+                'describe',
+                entities,
+                payload_cache=payload_cache,
+                caliper_entity_list=entities,
+                sensor_id=sensor_id)
+            self._process_results(results, self.stats.update_describes)
+            self._remember(identifiers)
+        return identifiers
+
+    async def send(self, events=None, described_objects=None, sensor_id=None):
+        return await self._send(events, described_objects=described_objects, sensor_id=sensor_id)
+
+    async def _send(self, events, described_objects=None, sensor_id=None, payload_cache=None):
+        identifiers = None
+        if self._ensure_list_type(events, Event, payload_cache):
+            results, identifiers = await self._request(
+                'send',
+                events,
+                payload_cache=payload_cache,
+                caliper_event_list=events,
+                described_objects=self._described_objects(described_objects),
+                sensor_id=sensor_id)
+            self._process_results(results, self.stats.update_measures)
+            self._remember(identifiers)
+        return identifiers
+
+    async def flush(self):
+        pass
+
+    async def close(self):
+        if isinstance(self._requestor, AsyncHttpRequestor):
+            await self._requestor.close()
+
+
+class AsyncSensor(Sensor):
+    _client_class = AsyncClient
+
+    @staticmethod
+    def fashion_default_sensor_with_client(client=None, sensor_id=None):
+        if not (isinstance(client, AsyncClient)):
+            raise_with_traceback(TypeError('client must implement AsyncClient'))
+        s = AsyncSensor(sensor_id=sensor_id)
+        s.register_client('default', client)
+        return s
+
+    @staticmethod
+    def fashion_sensor_with_config(config_options=None, sensor_id=None):
+        if not (isinstance(config_options, HttpOptions)):
+            raise_with_traceback(TypeError('config_options must implement HttpOptions'))
+        s = AsyncSensor(sensor_id=sensor_id)
+        s.register_client('default', AsyncClient(config_options=config_options))
+        return s
+
+    # registered clients are all sent to concurrently, so the caller waits on
+    # the slowest endpoint rather than the sum of all of them; clients still
+    # running at the sensor's deadline are cancelled and map to None
+    async def _fan_out(self, call):
+        tasks = [(k, asyncio.ensure_future(call(client)))
+                 for k, client in self.client_registry.items()]
+        if not tasks:
+            return {}
+        timeout = self._timeout / 1000.0 if self._timeout else None
+        await asyncio.wait([t for k, t in tasks], timeout=timeout)
+
+        identifiers = {}
+        for k, t in tasks:
+            if t.done():
+                identifiers.update({k: t.result()})
+            else:
+                logger.warning('Caliper client {0} missed the sensor deadline'.format(k))
+                t.cancel()
+                identifiers.update({k: None})
+        return identifiers
+
+    async def describe(self, entities=None):
+        v = entities
+        if not isinstance(v, collections.MutableSequence):
+            v = [v]
+        cache = PayloadCache()
+        return await self._fan_out(lambda client: self._call_client(
+            client, 'describe', cache, entities=v, sensor_id=self.id))
+
+    async def send(self, events=None, described_objects=None):
+        v = events
+        if not isinstance(v, collections.MutableSequence):
+            v = [v]
+        cache = PayloadCache()
+        return await self._fan_out(lambda client: self._call_client(
+            client, 'send', cache, events=v, described_objects=described_objects,
+            sensor_id=self.id))
+
+    async def flush(self):
+        pass
+
+    async def close(self):
+        await asyncio.gather(*[client.close() for client in self.client_registry.values()])
+
+    def register_client(self, key, client):
+        if not (isinstance(client, AsyncClient)):
+            raise_with_traceback(TypeError('client must implement AsyncClient'))
+        Sensor.register_client(self, key, client)
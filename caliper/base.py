@@ -24,14 +24,67 @@ install_aliases()
 from future.utils import raise_with_traceback, with_metaclass
 from builtins import *
 
-import collections, copy, importlib, json, re, warnings
+import collections, contextlib, copy, datetime, importlib, io, json, re, threading, warnings
 from aniso8601 import (parse_datetime as aniso_parse_datetime, parse_date as aniso_parse_date,
                        parse_time as aniso_parse_time, parse_duration as aniso_parse_duration)
 from rfc3986 import is_valid_uri as rfc3986_is_valid_uri
 from urllib.parse import urlparse as urllib_urlparse
 
-from caliper.constants import (CALIPER_CLASSES, CALIPER_TYPES, CALIPER_CONTEXTS,
-                               CALIPER_TYPES_FOR_CLASSES)
+from caliper.binaryformat import get_format
+from caliper.jsonbackend import get_backend
+from caliper.util.cache import memoize
+from caliper.constants import (BINARY_FORMATS, CALIPER_CLASSES, CALIPER_TYPES, CALIPER_CONTEXTS,
+                               CALIPER_TYPES_FOR_CLASSES, EVENT_TYPES, JSON_BACKENDS,
+                               PAYLOAD_COMPRESSION, VALIDATION_LEVELS)
+
+## Validation levels. At the strict level every object is checked as it's built
+# or changed; at the boundary level objects are checked only as they come into
+# the package, through the condensor, and go out of it, through a client; at the
+# trusted level they're never checked, except by an explicit validate(). The
+# level is set for the whole process, or for the current thread with the
+# validation_level() context manager.
+_validation_level = VALIDATION_LEVELS['STRICT']
+_local_validation = threading.local()
+
+
+def get_validation_level():
+    return getattr(_local_validation, 'level', None) or _validation_level
+
+
+def set_validation_level(level):
+    global _validation_level
+    if level not in VALIDATION_LEVELS.values():
+        raise_with_traceback(ValueError('level must be in the list of validation levels'))
+    _validation_level = level
+
+
+@contextlib.contextmanager
+def validation_level(level):
+    if level not in VALIDATION_LEVELS.values():
+        raise_with_traceback(ValueError('level must be in the list of validation levels'))
+    previous = getattr(_local_validation, 'level', None)
+    _local_validation.level = level
+    try:
+        yield level
+    finally:
+        _local_validation.level = previous
+
+
+# objects crossing the boundary get the strict checks, unless they're trusted
+@contextlib.contextmanager
+def _validation_boundary():
+    if get_validation_level() == VALIDATION_LEVELS['BOUNDARY']:
+        with validation_level(VALIDATION_LEVELS['STRICT']):
+            yield
+    else:
+        yield
+
+
+# the same test as get_validation_level(), without the call, as every setter makes it
+def _validating():
+    return (getattr(_local_validation, 'level', None) or
+            _validation_level) == VALIDATION_LEVELS['STRICT']
+
 
 ## Convenience functions
 
@@ -50,7 +103,20 @@ def _get_base_context(ctxt):
     else:
         return ctxt
 
-def is_valid_date(date):
+# the canonical Caliper forms, with fields in range and no more digits than the
+# full ISO 8601 parser can take (which also refuses a -00:00 offset); values
+# matching these are valid, and anything else is left to the full parser
+_DATE_PATTERN = r'[0-9]{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])'
+_TIME_PATTERN = (r'(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](?:\.[0-9]{1,6})?'
+                 r'(?:Z|[+-](?!00:00)(?:[01][0-9]|2[0-3]):[0-5][0-9]|\+00:00)?')
+_DATE_FAST_PATH = re.compile(r'({0})(?:T{1})?\Z'.format(_DATE_PATTERN, _TIME_PATTERN))
+_TIME_FAST_PATH = re.compile(r'{0}\Z'.format(_TIME_PATTERN))
+_DURATION_FAST_PATH = re.compile(
+    r'P(?=[0-9]|T[0-9])(?:[0-9]{1,4}Y)?(?:[0-9]{1,4}M)?(?:[0-9]{1,4}D)?'
+    r'(?:T(?=[0-9])(?:[0-9]{1,4}H)?(?:[0-9]{1,4}M)?(?:[0-9]{1,4}(?:\.[0-9]{1,6})?S)?)?\Z')
+
+
+def _is_valid_date_full(date):
     try:
         aniso_parse_datetime(date)
         return True
@@ -62,7 +128,33 @@ def is_valid_date(date):
             return False
 
 
-def is_valid_duration(dur):
+# dates and times repeat across events as much as identifiers do, so string
+# results are cached, like is_valid_URI's
+@memoize(maxsize=8192)
+def _is_valid_date_str(date):
+    m = _DATE_FAST_PATH.match(date)
+    if m:
+        try:
+            # the pattern can't tell how many days each month has
+            datetime.date(*[int(f) for f in m.group(1).split('-')])
+            return True
+        except ValueError:
+            return False
+    return _is_valid_date_full(date)
+
+
+def is_valid_date(date):
+    if not date:
+        return False
+    elif isinstance(date, str):
+        return _is_valid_date_str(date)
+    return _is_valid_date_full(date)
+
+
+is_valid_date.cache = _is_valid_date_str.cache
+
+
+def _is_valid_duration_full(dur):
     try:
         aniso_parse_duration(dur)
         return True
@@ -70,7 +162,23 @@ def is_valid_duration(dur):
         return False
 
 
-def is_valid_time(time):
+@memoize(maxsize=1024)
+def _is_valid_duration_str(dur):
+    return bool(_DURATION_FAST_PATH.match(dur)) or _is_valid_duration_full(dur)
+
+
+def is_valid_duration(dur):
+    if not dur:
+        return False
+    elif isinstance(dur, str):
+        return _is_valid_duration_str(dur)
+    return _is_valid_duration_full(dur)
+
+
+is_valid_duration.cache = _is_valid_duration_str.cache
+
+
+def _is_valid_time_full(time):
     try:
         aniso_parse_time(time)
         return True
@@ -78,35 +186,132 @@ def is_valid_time(time):
         return False
 
 
-def is_valid_URI(uri):
-    if not uri:
+@memoize(maxsize=1024)
+def _is_valid_time_str(time):
+    return bool(_TIME_FAST_PATH.match(time)) or _is_valid_time_full(time)
+
+
+def is_valid_time(time):
+    if not time:
         return False
-    elif (isinstance(uri, str)
-          and (urllib_urlparse(uri).geturl() == uri)
-          and rfc3986_is_valid_uri(uri)):
-        return True
-    else:
+    elif isinstance(time, str):
+        return _is_valid_time_str(time)
+    return _is_valid_time_full(time)
+
+
+is_valid_time.cache = _is_valid_time_str.cache
+
+
+# the common forms of identifier: http(s) URLs with no query, fragment, params
+# or escapes, and UUID URNs; anything these match passes the full check
+_URI_FAST_PATH = re.compile(
+    r'(?:https?://[A-Za-z0-9.-]+(?::[0-9]{1,5})?(?:/[A-Za-z0-9._~!$&\'()*+,=:@/-]*)?'
+    r'|urn:uuid:[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12})\Z')
+
+
+def _is_valid_URI_full(uri):
+    return bool((urllib_urlparse(uri).geturl() == uri) and rfc3986_is_valid_uri(uri))
+
+
+# the same identifiers recur across events, so results are cached; the cache's
+# hit and miss counts are available as is_valid_URI.cache
+@memoize(maxsize=8192)
+def _is_valid_URI_str(uri):
+    return bool(_URI_FAST_PATH.match(uri)) or _is_valid_URI_full(uri)
+
+
+def is_valid_URI(uri):
+    if not uri or not isinstance(uri, str):
         return False
+    return _is_valid_URI_str(uri)
+
+
+is_valid_URI.cache = _is_valid_URI_str.cache
+
+
+_EVENT_TYPE_NAMES = frozenset(EVENT_TYPES.values())
+
+
+# add the identifiers in a plain dict or list to ids, in the order sorted JSON
+# output lists them, each paired with whether it identifies an event
+def _collect_ids(v, ids):
+    if isinstance(v, collections.Mapping):
+        for k in sorted(v):
+            item = v[k]
+            if k == '@context':
+                continue
+            elif k == 'id' and item and isinstance(item, str):
+                ids.append((item, v.get('type') in _EVENT_TYPE_NAMES))
+            else:
+                _collect_ids(item, ids)
+    elif isinstance(v, collections.MutableSequence):
+        for item in v:
+            _collect_ids(item, ids)
+
+
+# the identifiers collected while serializing, all in one list, or split into
+# event identifiers and entity identifiers
+def _split_ids(ids, split_ids=False):
+    if split_ids:
+        return [i for i, e in ids if e], [i for i, e in ids if not e]
+    return [i for i, e in ids]
+
+
+## Registry of the caliper classes by type name. It's built on first use, since
+# the classes live in modules that import this one, and with it a bitmask for
+# each class of the registered classes it is a subclass of, so that checking
+# one registered class against another is a single lookup
+class _TypeRegistry(object):
+    def __init__(self):
+        self._classes = None
+        self._bits = {}
+        self._masks = {}
+
+    def _build(self):
+        classes = {}
+        for name, path in CALIPER_CLASSES.items():
+            m, c = path.rsplit('.', 1)
+            classes[name] = getattr(importlib.import_module(m), c)
+        registered = list(set(classes.values()))
+        bits = dict((cls, 1 << i) for i, cls in enumerate(registered))
+        self._masks = dict((cls, sum(bit for sup, bit in bits.items() if issubclass(cls, sup)))
+                           for cls in registered)
+        self._bits = bits
+        self._classes = classes
+        return classes
+
+    def get(self, name):
+        return (self._classes or self._build()).get(name)
+
+    def is_subclass(self, c1, c2):
+        mask = self._masks.get(c1)
+        bit = self._bits.get(c2)
+        if mask is None or bit is None:
+            return issubclass(c1, c2)
+        return bool(mask & bit)
+
+
+_types = _TypeRegistry()
+_CALIPER_TYPE_NAMES = frozenset(CALIPER_TYPES.values())
 
 
 def _get_type(t):
-    m = c = ''
     if t and isinstance(t, type):
-        m, c = t.__module__, t.__name__
-    elif t:
-        m, c = CALIPER_CLASSES.get(t, '.').rsplit('.', 1)
-    try:
-        return getattr(importlib.import_module(m), c)
-    except (ImportError, ValueError) as e:
+        return t
+    cls = _types.get(t) if t else None
+    if cls is None:
         raise_with_traceback(ValueError('Unknown type: {0}'.format(str(t))))
+    return cls
 
 
 def is_subtype(t1, t2):
-    return issubclass(_get_type(t1), _get_type(t2))
+    return _types.is_subclass(_get_type(t1), _get_type(t2))
 
 
 def ensure_type(p, t, optional=False):
     # exception or True
+    if not _validating():
+        return True
     if p == None:
         if optional:
             return True
@@ -120,7 +325,7 @@ def ensure_type(p, t, optional=False):
         else:
             return True
     elif t and not (
-        (isinstance(p, str) and is_valid_URI(p) and t in CALIPER_TYPES.values()) or
+        (isinstance(p, str) and is_valid_URI(p) and t in _CALIPER_TYPE_NAMES) or
         (isinstance(p, BaseEntity) and is_subtype(p.type, t)) or
         (isinstance(p, BaseEvent) and is_subtype(p.type, t)) or
         (isinstance(p, collections.MutableMapping) and is_subtype(p.get('type', dict), t)) or
@@ -129,24 +334,141 @@ def ensure_type(p, t, optional=False):
     return True
 
 
-def ensure_list_type(l, t):
+# with validate, each caliper object in the list also gets the full checks
+def ensure_list_type(l, t, validate=False):
     # exception or True
+    if validate:
+        with validation_level(VALIDATION_LEVELS['STRICT']):
+            for i in l:
+                ensure_type(i, t)
+                if isinstance(i, CaliperSerializable):
+                    i.validate()
+        return True
     for i in l:
         ensure_type(i, t)
     return True
 
 
+## Index of the identifiers of objects already described to an endpoint, for
+# reuse as the described_objects of many sends. Changes replace the underlying
+# frozenset rather than modifying it, so a send that is serializing against the
+# index is never affected by a change made meanwhile.
+class DescribedIndex(object):
+    def __init__(self, ids=None):
+        self._lock = threading.Lock()
+        self._ids = frozenset(ids or ())
+
+    def __contains__(self, the_id):
+        return the_id in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def ids(self):
+        return self._ids
+
+    def update(self, ids):
+        with self._lock:
+            self._ids = self._ids.union(ids)
+
+    def add(self, the_id):
+        self.update([the_id])
+
+    def discard(self, the_id):
+        with self._lock:
+            self._ids = self._ids.difference([the_id])
+
+    def clear(self):
+        with self._lock:
+            self._ids = frozenset()
+
+
+## Identifiers described to an endpoint, looked up both in the described objects
+# given for a send and in a registry of them (anything with a __contains__) kept
+# beside them, without building their union for every send. Lookups that share
+# the same described objects and registry are equal, so that serializations
+# made against them can be shared.
+class _DescribedLookup(object):
+    def __init__(self, ids, registry):
+        self._ids = ids
+        self._registry = registry
+
+    def __contains__(self, the_id):
+        return the_id in self._ids or the_id in self._registry
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return (isinstance(other, _DescribedLookup) and self._ids == other._ids
+                and self._registry is other._registry)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self._ids, id(self._registry)))
+
+
+# described_objects may be any iterable of identifiers, or a DescribedIndex; it
+# is normalized once, up front, so that every lookup during serialization is a
+# hash lookup rather than a scan
+def _described_set(described_objects):
+    if isinstance(described_objects, DescribedIndex):
+        return described_objects.ids
+    if isinstance(described_objects, (frozenset, _DescribedLookup)):
+        return described_objects
+    return frozenset(described_objects or ())
+
+
 ### Default configuration values ###
 class Options(object):
 
     default_options = {
         'API_KEY': '',
         'AUTH_SCHEME': '',
+        'BATCH_MAX_AGE': 1000,
+        'BATCH_MAX_EVENTS': 100,
+        'BATCH_QUEUE_SIZE': 10000,
+        'BUFFERED': False,
+        'CIRCUIT_BREAKER': False,
+        'CIRCUIT_FAILURE_RATE': 50,
+        'CIRCUIT_HALF_OPEN_CALLS': 1,
+        'CIRCUIT_MIN_CALLS': 10,
+        'CIRCUIT_OPEN_DURATION': 30000,
+        'CIRCUIT_SLOW_CALL_DURATION': 0,
+        'CIRCUIT_WINDOW': 20,
+        'COMPRESSION': PAYLOAD_COMPRESSION['NONE'],
+        'COMPRESSION_THRESHOLD': 1024,
         'CONNECTION_REQUEST_TIMEOUT': 1000,
         'CONNECTION_TIMEOUT': 1000,
+        'DESCRIBED_REGISTRY_SIZE': 0,
+        'DESCRIBED_REGISTRY_TTL': 3600000,
+        'FRAGMENT_CACHE_SIZE': 0,
         'HOST': None,
+        'JSON_BACKEND': JSON_BACKENDS['STDLIB'],
+        'JSON_COMPACT': False,
+        'JSON_SORT_KEYS': True,
+        'MAX_ENVELOPE_BYTES': 0,
+        'MAX_EVENTS_PER_ENVELOPE': 0,
         'OPTIMIZE_SERIALIZATION': True,
+        'POOL_CONNECTIONS': 10,
+        'POOL_IDLE_TIMEOUT': 60000,
+        'POOL_MAXSIZE': 10,
+        'RETRY_BACKOFF': 100,
+        'RETRY_BACKOFF_MAX': 10000,
+        'RETRY_LIMIT': 0,
+        'RETRY_TIME_LIMIT': 30000,
         'SOCKET_TIMEOUT': 1000,
+        'SPOOL_DIRECTORY': None,
+        'SPOOL_MAX_BYTES': 268435456,
+        'SPOOL_REPLAY_INTERVAL': 5000,
+        'SPOOL_SEGMENT_BYTES': 16777216,
+        'VALIDATION_LEVEL': None,
     }
 
     def __init__(self, opts=None):
@@ -177,6 +499,151 @@ class Options(object):
         else:
             raise_with_traceback(ValueError('new key value must be a string'))
 
+    @property
+    def BATCH_MAX_AGE(self):
+        return self._config['BATCH_MAX_AGE']
+
+    @BATCH_MAX_AGE.setter
+    def BATCH_MAX_AGE(self, new_age):
+        if int(new_age) >= 1:
+            self._config['BATCH_MAX_AGE'] = int(new_age)
+        else:
+            raise_with_traceback(ValueError('new batch age must be at least 1 millisecond'))
+
+    @property
+    def BATCH_MAX_EVENTS(self):
+        return self._config['BATCH_MAX_EVENTS']
+
+    @BATCH_MAX_EVENTS.setter
+    def BATCH_MAX_EVENTS(self, new_size):
+        if int(new_size) >= 1:
+            self._config['BATCH_MAX_EVENTS'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new batch size must be at least 1'))
+
+    @property
+    def BATCH_QUEUE_SIZE(self):
+        return self._config['BATCH_QUEUE_SIZE']
+
+    @BATCH_QUEUE_SIZE.setter
+    def BATCH_QUEUE_SIZE(self, new_size):
+        if int(new_size) >= 1:
+            self._config['BATCH_QUEUE_SIZE'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new queue size must be at least 1'))
+
+    @property
+    def BUFFERED(self):
+        return self._config['BUFFERED']
+
+    @BUFFERED.setter
+    def BUFFERED(self, buffered):
+        if buffered:
+            self._config['BUFFERED'] = True
+        else:
+            self._config['BUFFERED'] = False
+
+    @property
+    def CIRCUIT_BREAKER(self):
+        return self._config['CIRCUIT_BREAKER']
+
+    @CIRCUIT_BREAKER.setter
+    def CIRCUIT_BREAKER(self, enabled):
+        if enabled:
+            self._config['CIRCUIT_BREAKER'] = True
+        else:
+            self._config['CIRCUIT_BREAKER'] = False
+
+    @property
+    def CIRCUIT_FAILURE_RATE(self):
+        return self._config['CIRCUIT_FAILURE_RATE']
+
+    @CIRCUIT_FAILURE_RATE.setter
+    def CIRCUIT_FAILURE_RATE(self, new_rate):
+        if 1 <= int(new_rate) <= 100:
+            self._config['CIRCUIT_FAILURE_RATE'] = int(new_rate)
+        else:
+            raise_with_traceback(ValueError('new failure rate must be between 1 and 100 percent'))
+
+    @property
+    def CIRCUIT_HALF_OPEN_CALLS(self):
+        return self._config['CIRCUIT_HALF_OPEN_CALLS']
+
+    @CIRCUIT_HALF_OPEN_CALLS.setter
+    def CIRCUIT_HALF_OPEN_CALLS(self, new_calls):
+        if int(new_calls) >= 1:
+            self._config['CIRCUIT_HALF_OPEN_CALLS'] = int(new_calls)
+        else:
+            raise_with_traceback(ValueError('new half-open call count must be at least 1'))
+
+    @property
+    def CIRCUIT_MIN_CALLS(self):
+        return self._config['CIRCUIT_MIN_CALLS']
+
+    @CIRCUIT_MIN_CALLS.setter
+    def CIRCUIT_MIN_CALLS(self, new_calls):
+        if int(new_calls) >= 1:
+            self._config['CIRCUIT_MIN_CALLS'] = int(new_calls)
+        else:
+            raise_with_traceback(ValueError('new minimum call count must be at least 1'))
+
+    @property
+    def CIRCUIT_OPEN_DURATION(self):
+        return self._config['CIRCUIT_OPEN_DURATION']
+
+    @CIRCUIT_OPEN_DURATION.setter
+    def CIRCUIT_OPEN_DURATION(self, new_duration):
+        if int(new_duration) >= 1:
+            self._config['CIRCUIT_OPEN_DURATION'] = int(new_duration)
+        else:
+            raise_with_traceback(ValueError('new open duration must be at least 1 millisecond'))
+
+    @property
+    def CIRCUIT_SLOW_CALL_DURATION(self):
+        return self._config['CIRCUIT_SLOW_CALL_DURATION']
+
+    @CIRCUIT_SLOW_CALL_DURATION.setter
+    def CIRCUIT_SLOW_CALL_DURATION(self, new_duration):
+        # a zero duration disables the latency threshold
+        if int(new_duration) >= 0:
+            self._config['CIRCUIT_SLOW_CALL_DURATION'] = int(new_duration)
+        else:
+            raise_with_traceback(ValueError('new slow call duration cannot be negative'))
+
+    @property
+    def CIRCUIT_WINDOW(self):
+        return self._config['CIRCUIT_WINDOW']
+
+    @CIRCUIT_WINDOW.setter
+    def CIRCUIT_WINDOW(self, new_window):
+        if int(new_window) >= 1:
+            self._config['CIRCUIT_WINDOW'] = int(new_window)
+        else:
+            raise_with_traceback(ValueError('new window size must be at least 1 call'))
+
+    @property
+    def COMPRESSION(self):
+        return self._config['COMPRESSION']
+
+    @COMPRESSION.setter
+    def COMPRESSION(self, new_compression):
+        if new_compression in PAYLOAD_COMPRESSION.values():
+            self._config['COMPRESSION'] = new_compression
+        else:
+            raise_with_traceback(
+                ValueError('compression must be in the list of payload compression values'))
+
+    @property
+    def COMPRESSION_THRESHOLD(self):
+        return self._config['COMPRESSION_THRESHOLD']
+
+    @COMPRESSION_THRESHOLD.setter
+    def COMPRESSION_THRESHOLD(self, new_threshold):
+        if int(new_threshold) >= 0:
+            self._config['COMPRESSION_THRESHOLD'] = int(new_threshold)
+        else:
+            raise_with_traceback(ValueError('new compression threshold cannot be negative'))
+
     @property
     def CONNECTION_REQUEST_TIMEOUT(self):
         return self._config['CONNECTION_REQUEST_TIMEOUT']
@@ -201,6 +668,41 @@ class Options(object):
             raise_with_traceback(
                 ValueError('new timeout value must be at least 1000 milliseconds'))
 
+    @property
+    def DESCRIBED_REGISTRY_SIZE(self):
+        return self._config['DESCRIBED_REGISTRY_SIZE']
+
+    @DESCRIBED_REGISTRY_SIZE.setter
+    def DESCRIBED_REGISTRY_SIZE(self, new_size):
+        # a zero size turns described-entity tracking off
+        if int(new_size) >= 0:
+            self._config['DESCRIBED_REGISTRY_SIZE'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new registry size cannot be negative'))
+
+    @property
+    def DESCRIBED_REGISTRY_TTL(self):
+        return self._config['DESCRIBED_REGISTRY_TTL']
+
+    @DESCRIBED_REGISTRY_TTL.setter
+    def DESCRIBED_REGISTRY_TTL(self, new_ttl):
+        if int(new_ttl) >= 1:
+            self._config['DESCRIBED_REGISTRY_TTL'] = int(new_ttl)
+        else:
+            raise_with_traceback(ValueError('new registry TTL must be at least 1 millisecond'))
+
+    @property
+    def FRAGMENT_CACHE_SIZE(self):
+        return self._config['FRAGMENT_CACHE_SIZE']
+
+    @FRAGMENT_CACHE_SIZE.setter
+    def FRAGMENT_CACHE_SIZE(self, new_size):
+        # a zero size turns the fragment cache off
+        if int(new_size) >= 0:
+            self._config['FRAGMENT_CACHE_SIZE'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new cache size cannot be negative'))
+
     @property
     def HOST(self):
         return self._config['HOST']
@@ -210,6 +712,64 @@ class Options(object):
         if is_valid_URI(new_host):
             self._config['HOST'] = str(new_host)
 
+    @property
+    def JSON_BACKEND(self):
+        return self._config['JSON_BACKEND']
+
+    @JSON_BACKEND.setter
+    def JSON_BACKEND(self, new_backend):
+        if new_backend in JSON_BACKENDS.values():
+            self._config['JSON_BACKEND'] = new_backend
+        else:
+            raise_with_traceback(ValueError('JSON backend must be in the list of JSON backends'))
+
+    @property
+    def JSON_COMPACT(self):
+        return self._config['JSON_COMPACT']
+
+    @JSON_COMPACT.setter
+    def JSON_COMPACT(self, compact):
+        if compact:
+            self._config['JSON_COMPACT'] = True
+        else:
+            self._config['JSON_COMPACT'] = False
+
+    # without sorting, keys go out in the order they're serialized in, which is
+    # sorted for caliper objects, but not necessarily for plain dicts within them
+    @property
+    def JSON_SORT_KEYS(self):
+        return self._config['JSON_SORT_KEYS']
+
+    @JSON_SORT_KEYS.setter
+    def JSON_SORT_KEYS(self, sort_keys):
+        if sort_keys:
+            self._config['JSON_SORT_KEYS'] = True
+        else:
+            self._config['JSON_SORT_KEYS'] = False
+
+    # zero places no limit on envelope size
+    @property
+    def MAX_ENVELOPE_BYTES(self):
+        return self._config['MAX_ENVELOPE_BYTES']
+
+    @MAX_ENVELOPE_BYTES.setter
+    def MAX_ENVELOPE_BYTES(self, new_size):
+        if int(new_size) >= 0:
+            self._config['MAX_ENVELOPE_BYTES'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new envelope size cannot be negative'))
+
+    @property
+    def MAX_EVENTS_PER_ENVELOPE(self):
+        return self._config['MAX_EVENTS_PER_ENVELOPE']
+
+    @MAX_EVENTS_PER_ENVELOPE.setter
+    def MAX_EVENTS_PER_ENVELOPE(self, new_size):
+        if int(new_size) >= 0:
+            self._config['MAX_EVENTS_PER_ENVELOPE'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new envelope size cannot be negative'))
+
     @property
     def OPTIMIZE_SERIALIZATION(self):
         return self._config['OPTIMIZE_SERIALIZATION']
@@ -221,6 +781,84 @@ class Options(object):
         else:
             self._config['OPTIMIZE_SERIALIZATION'] = False
 
+    @property
+    def POOL_CONNECTIONS(self):
+        return self._config['POOL_CONNECTIONS']
+
+    @POOL_CONNECTIONS.setter
+    def POOL_CONNECTIONS(self, new_size):
+        if int(new_size) >= 1:
+            self._config['POOL_CONNECTIONS'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new pool size must be at least 1'))
+
+    @property
+    def POOL_IDLE_TIMEOUT(self):
+        return self._config['POOL_IDLE_TIMEOUT']
+
+    @POOL_IDLE_TIMEOUT.setter
+    def POOL_IDLE_TIMEOUT(self, new_timeout):
+        # a zero timeout keeps pooled connections open indefinitely
+        if int(new_timeout) >= 0:
+            self._config['POOL_IDLE_TIMEOUT'] = int(new_timeout)
+        else:
+            raise_with_traceback(ValueError('new timeout value cannot be negative'))
+
+    @property
+    def POOL_MAXSIZE(self):
+        return self._config['POOL_MAXSIZE']
+
+    @POOL_MAXSIZE.setter
+    def POOL_MAXSIZE(self, new_size):
+        if int(new_size) >= 1:
+            self._config['POOL_MAXSIZE'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new pool size must be at least 1'))
+
+    @property
+    def RETRY_BACKOFF(self):
+        return self._config['RETRY_BACKOFF']
+
+    @RETRY_BACKOFF.setter
+    def RETRY_BACKOFF(self, new_backoff):
+        if int(new_backoff) >= 1:
+            self._config['RETRY_BACKOFF'] = int(new_backoff)
+        else:
+            raise_with_traceback(ValueError('new backoff value must be at least 1 millisecond'))
+
+    @property
+    def RETRY_BACKOFF_MAX(self):
+        return self._config['RETRY_BACKOFF_MAX']
+
+    @RETRY_BACKOFF_MAX.setter
+    def RETRY_BACKOFF_MAX(self, new_backoff):
+        if int(new_backoff) >= 1:
+            self._config['RETRY_BACKOFF_MAX'] = int(new_backoff)
+        else:
+            raise_with_traceback(ValueError('new backoff value must be at least 1 millisecond'))
+
+    @property
+    def RETRY_LIMIT(self):
+        return self._config['RETRY_LIMIT']
+
+    @RETRY_LIMIT.setter
+    def RETRY_LIMIT(self, new_limit):
+        if int(new_limit) >= 0:
+            self._config['RETRY_LIMIT'] = int(new_limit)
+        else:
+            raise_with_traceback(ValueError('new retry limit cannot be negative'))
+
+    @property
+    def RETRY_TIME_LIMIT(self):
+        return self._config['RETRY_TIME_LIMIT']
+
+    @RETRY_TIME_LIMIT.setter
+    def RETRY_TIME_LIMIT(self, new_limit):
+        if int(new_limit) >= 0:
+            self._config['RETRY_TIME_LIMIT'] = int(new_limit)
+        else:
+            raise_with_traceback(ValueError('new retry time limit cannot be negative'))
+
     @property
     def SOCKET_TIMEOUT(self):
         return self._config['SOCKET_TIMEOUT']
@@ -233,37 +871,326 @@ class Options(object):
             raise_with_traceback(
                 ValueError('new timeout value must be at least 1000 milliseconds'))
 
+    # when set, envelopes that cannot be delivered are written to a spool in
+    # this directory and replayed once the endpoint recovers
+    @property
+    def SPOOL_DIRECTORY(self):
+        return self._config['SPOOL_DIRECTORY']
+
+    @SPOOL_DIRECTORY.setter
+    def SPOOL_DIRECTORY(self, new_directory):
+        if new_directory is None or isinstance(new_directory, str):
+            self._config['SPOOL_DIRECTORY'] = new_directory
+        else:
+            raise_with_traceback(ValueError('new spool directory must be a string'))
+
+    @property
+    def SPOOL_MAX_BYTES(self):
+        return self._config['SPOOL_MAX_BYTES']
+
+    @SPOOL_MAX_BYTES.setter
+    def SPOOL_MAX_BYTES(self, new_size):
+        if int(new_size) >= 1:
+            self._config['SPOOL_MAX_BYTES'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new spool size must be at least 1 byte'))
+
+    @property
+    def SPOOL_REPLAY_INTERVAL(self):
+        return self._config['SPOOL_REPLAY_INTERVAL']
+
+    @SPOOL_REPLAY_INTERVAL.setter
+    def SPOOL_REPLAY_INTERVAL(self, new_interval):
+        if int(new_interval) >= 1:
+            self._config['SPOOL_REPLAY_INTERVAL'] = int(new_interval)
+        else:
+            raise_with_traceback(ValueError('new replay interval must be at least 1 millisecond'))
+
+    @property
+    def SPOOL_SEGMENT_BYTES(self):
+        return self._config['SPOOL_SEGMENT_BYTES']
+
+    @SPOOL_SEGMENT_BYTES.setter
+    def SPOOL_SEGMENT_BYTES(self, new_size):
+        if int(new_size) >= 1:
+            self._config['SPOOL_SEGMENT_BYTES'] = int(new_size)
+        else:
+            raise_with_traceback(ValueError('new segment size must be at least 1 byte'))
+
+    # the validation level a client checks what it sends at; None follows the
+    # level in force where the client is used
+    @property
+    def VALIDATION_LEVEL(self):
+        return self._config['VALIDATION_LEVEL']
+
+    @VALIDATION_LEVEL.setter
+    def VALIDATION_LEVEL(self, level):
+        if level is None or level in VALIDATION_LEVELS.values():
+            self._config['VALIDATION_LEVEL'] = level
+        else:
+            raise_with_traceback(
+                ValueError('validation level must be in the list of validation levels'))
+
 
 class HttpOptions(Options):
     def __init__(
             self,
             api_key='CaliperKey',
             auth_scheme='',
+            batch_max_age=1000,
+            batch_max_events=100,
+            batch_queue_size=10000,
+            buffered=False,
+            circuit_breaker=False,
+            circuit_failure_rate=50,
+            circuit_half_open_calls=1,
+            circuit_min_calls=10,
+            circuit_open_duration=30000,
+            circuit_slow_call_duration=0,
+            circuit_window=20,
+            compression=PAYLOAD_COMPRESSION['NONE'],
+            compression_threshold=1024,
             connection_request_timeout=10000,
             connection_timeout=10000,
+            described_registry_size=0,
+            described_registry_ttl=3600000,
+            fragment_cache_size=0,
             host='http://httpbin.org/post',
+            json_backend=JSON_BACKENDS['STDLIB'],
+            json_compact=False,
+            json_sort_keys=True,
+            max_envelope_bytes=0,
+            max_events_per_envelope=0,
             optimize_serialization=True,
-            socket_timeout=10000, ):
+            pool_connections=10,
+            pool_idle_timeout=60000,
+            pool_maxsize=10,
+            retry_backoff=100,
+            retry_backoff_max=10000,
+            retry_limit=0,
+            retry_time_limit=30000,
+            socket_timeout=10000,
+            spool_directory=None,
+            spool_max_bytes=268435456,
+            spool_replay_interval=5000,
+            spool_segment_bytes=16777216,
+            validation_level=None, ):
         Options.__init__(self)
         self.API_KEY = api_key
         self.AUTH_SCHEME = auth_scheme
+        self.BATCH_MAX_AGE = batch_max_age
+        self.BATCH_MAX_EVENTS = batch_max_events
+        self.BATCH_QUEUE_SIZE = batch_queue_size
+        self.BUFFERED = buffered
+        self.CIRCUIT_BREAKER = circuit_breaker
+        self.CIRCUIT_FAILURE_RATE = circuit_failure_rate
+        self.CIRCUIT_HALF_OPEN_CALLS = circuit_half_open_calls
+        self.CIRCUIT_MIN_CALLS = circuit_min_calls
+        self.CIRCUIT_OPEN_DURATION = circuit_open_duration
+        self.CIRCUIT_SLOW_CALL_DURATION = circuit_slow_call_duration
+        self.CIRCUIT_WINDOW = circuit_window
+        self.COMPRESSION = compression
+        self.COMPRESSION_THRESHOLD = compression_threshold
         self.CONNECTION_REQUEST_TIMEOUT = connection_request_timeout
         self.CONNECTION_TIMEOUT = connection_timeout
+        self.DESCRIBED_REGISTRY_SIZE = described_registry_size
+        self.DESCRIBED_REGISTRY_TTL = described_registry_ttl
+        self.FRAGMENT_CACHE_SIZE = fragment_cache_size
         self.HOST = host
+        self.JSON_BACKEND = json_backend
+        self.JSON_COMPACT = json_compact
+        self.JSON_SORT_KEYS = json_sort_keys
+        self.MAX_ENVELOPE_BYTES = max_envelope_bytes
+        self.MAX_EVENTS_PER_ENVELOPE = max_events_per_envelope
         self.OPTIMIZE_SERIALIZATION = optimize_serialization
+        self.POOL_CONNECTIONS = pool_connections
+        self.POOL_IDLE_TIMEOUT = pool_idle_timeout
+        self.POOL_MAXSIZE = pool_maxsize
+        self.RETRY_BACKOFF = retry_backoff
+        self.RETRY_BACKOFF_MAX = retry_backoff_max
+        self.RETRY_LIMIT = retry_limit
+        self.RETRY_TIME_LIMIT = retry_time_limit
         self.SOCKET_TIMEOUT = socket_timeout
+        self.SPOOL_DIRECTORY = spool_directory
+        self.SPOOL_MAX_BYTES = spool_max_bytes
+        self.SPOOL_REPLAY_INTERVAL = spool_replay_interval
+        self.SPOOL_SEGMENT_BYTES = spool_segment_bytes
+        self.VALIDATION_LEVEL = validation_level
 
     def get_auth_header_value(self):
         return '{0} {1}'.format(self.AUTH_SCHEME, self.API_KEY)
 
 
+## Serialization plans. Each caliper class sets the same properties on all of its
+# instances, so the sorted order of an object's property keys is worked out once
+# per class, on first use, and cached on the class; an object whose keys differ
+# from its class's plan falls back to sorting its own. How a property value is
+# handled depends only on the value's type, so that decision is also made once
+# per type and kept in a dispatch table.
+class _SerializationPlan(object):
+    def __init__(self, keys):
+        self.keyset = frozenset(keys)
+        self.keys = sorted(self.keyset)
+
+    def keys_for(self, props):
+        if len(props) == len(self.keyset) and self.keyset.issuperset(props):
+            return self.keys
+        return sorted(props)
+
+
+def _get_plan(obj):
+    cls = type(obj)
+    plan = cls.__dict__.get('_serialization_plan')
+    if plan is None:
+        plan = _SerializationPlan(obj._props)
+        cls._serialization_plan = plan
+    return plan
+
+
+# value kinds, and when thin_props drops a value: never, always, when empty, or
+# when it compares equal to None, {} or [] (for types we can't be sure about)
+_KIND_SCALAR, _KIND_LIST, _KIND_OBJECT, _KIND_MAPPING = range(4)
+_THIN_NEVER, _THIN_ALWAYS, _THIN_EMPTY, _THIN_COMPARE = range(4)
+_NEVER_EMPTY_TYPES = (bool, float, type(0), type(''), type(b''))
+_value_kinds = {}
+
+
+def _kind_of(v):
+    t = type(v)
+    try:
+        return _value_kinds[t]
+    except KeyError:
+        pass
+    if v is None:
+        k = (_KIND_SCALAR, _THIN_ALWAYS)
+    elif issubclass(t, collections.MutableSequence):
+        k = (_KIND_LIST, _THIN_EMPTY if t is list else _THIN_COMPARE)
+    elif issubclass(t, CaliperSerializable):
+        k = (_KIND_OBJECT, _THIN_NEVER)
+    elif issubclass(t, collections.MutableMapping):
+        k = (_KIND_MAPPING, _THIN_EMPTY if t is dict else _THIN_COMPARE)
+    elif t in _NEVER_EMPTY_TYPES:
+        k = (_KIND_SCALAR, _THIN_NEVER)
+    else:
+        k = (_KIND_SCALAR, _THIN_COMPARE)
+    _value_kinds[t] = k
+    return k
+
+
+def _is_thinned(v, thin):
+    return (thin == _THIN_ALWAYS or (thin == _THIN_EMPTY and not v)
+            or (thin == _THIN_COMPARE and v in (None, {}, [])))
+
+
+_serializable_types = {}
+
+
+def _is_serializable_type(t):
+    r = _serializable_types.get(t)
+    if r is None:
+        r = _serializable_types[t] = is_subtype(t, CaliperSerializable)
+    return r
+
+
+_interned_contexts = {}
+
+
+# a hashable stand-in for a JSON-LD context, equal for equal contexts; context
+# strings are interned, so that comparing equal ones is an identity check
+def _context_key(ctxt):
+    if isinstance(ctxt, str):
+        return _interned_contexts.setdefault(ctxt, ctxt)
+    elif isinstance(ctxt, collections.Mapping):
+        return json.dumps(ctxt, sort_keys=True)
+    elif isinstance(ctxt, (list, tuple)):
+        return tuple(_context_key(c) for c in ctxt)
+    return ctxt
+
+
+## Immutable stack of the contexts already in force where an object is being
+# serialized with thin_context. Pushing returns a new stack sharing nothing
+# mutable with the old one, so one stack can be handed down to every nested
+# object without copying; membership is a set lookup.
+class _ContextStack(object):
+    __slots__ = ('keys', )
+
+    def __init__(self, keys=frozenset()):
+        self.keys = keys
+
+    def __bool__(self):
+        return bool(self.keys)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, ctxt):
+        return _context_key(ctxt) in self.keys
+
+    def push(self, ctxt):
+        key = _context_key(ctxt)
+        if key in self.keys:
+            return self
+        return _ContextStack(self.keys | frozenset([key]))
+
+
+_NO_CONTEXTS = _ContextStack()
+
+
+## Buffers the text written by the streaming JSON writer into the sink: a
+# bytearray, which is extended with the UTF-8 bytes; a text stream, written
+# with strings; or any other file-like object, written with UTF-8 bytes
+class _JsonSink(object):
+    def __init__(self, sink, buffer_size=65536):
+        self._buffer_size = buffer_size
+        self._pieces = []
+        self._size = 0
+        if isinstance(sink, bytearray):
+            self._emit = lambda s: sink.extend(s.encode('utf-8'))
+        elif isinstance(sink, io.TextIOBase):
+            self._emit = sink.write
+        else:
+            self._emit = lambda s: sink.write(s.encode('utf-8'))
+
+    def write(self, s):
+        self._pieces.append(s)
+        self._size += len(s)
+        if self._size >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._pieces:
+            self._emit(''.join(self._pieces))
+            self._pieces = []
+            self._size = 0
+
+
+# strings are by far the most common values, so they skip straight to the
+# json module's own (C, where available) string encoder
+_encode_str = json.encoder.encode_basestring_ascii
+
+
+def _dumps(v):
+    if isinstance(v, str):
+        return _encode_str(v)
+    return json.dumps(v, sort_keys=True)
+
+
+def _validate_nested(v, seen):
+    if isinstance(v, CaliperSerializable):
+        v._validate(seen)
+    elif isinstance(v, collections.MutableSequence):
+        for item in v:
+            _validate_nested(item, seen)
+
+
 ### Caliper serializable base class for all caliper objects that need serialization ###
 class CaliperSerializable(object):
     def __init__(self):
         self._props = {}
+        self._version = 0
 
     # these methods are the only ones that directly touch the object's underlying
-    # property/object cache
+    # property/object cache; every update bumps the object's version, which is
+    # what invalidates cached serialized fragments of the object
     def _get_prop(self, k):
         return self._props.get(k)
 
@@ -272,6 +1199,7 @@ class CaliperSerializable(object):
             raise_with_traceback(ValueError('{0} must have a non-null value'.format(str(k))))
         if k:
             self._props.update({k: v})
+            self._version += 1
 
     # protected base-type setters that inheriting classes use internally to set
     # underlying state
@@ -307,7 +1235,7 @@ class CaliperSerializable(object):
 
     def _set_uri_prop(self, k, v, req=False):
         val = None
-        if is_valid_URI(v):
+        if _validating() and is_valid_URI(v):
             val = v
         self._set_str_prop(k, v, req=req)
 
@@ -315,25 +1243,25 @@ class CaliperSerializable(object):
     def _set_context(self, v, expected_base_context):
         if not v:
             self._update_props('@context', expected_base_context, req=True)
-        elif is_valid_context(v, expected_base_context):
+        elif not _validating() or is_valid_context(v, expected_base_context):
             self._update_props('@context', v, req=True)
 
     def _set_date_prop(self, k, v, req=False):
         val = None
-        if is_valid_date(v):
+        if not _validating() or is_valid_date(v):
             val = v
         self._set_untyped_prop(k, val, req=req)
 
     def _set_dict_prop(self, k, v, req=False):
         if req and (v == None):
             raise_with_traceback(ValueError('{0} must have a non-null value'.format(str(k))))
-        elif v and not (isinstance(v, collections.MutableMapping)):
+        elif v and _validating() and not (isinstance(v, collections.MutableMapping)):
             raise_with_traceback(ValueError('{0} must be a dictionary'.format(str(k))))
         self._update_props(k, v or {}, req=req)
 
     def _set_duration_prop(self, k, v, req=False):
         val = None
-        if is_valid_duration(v):
+        if _validating() and is_valid_duration(v):
             val = v
         self._set_untyped_prop(k, v, req=req)
 
@@ -343,7 +1271,7 @@ class CaliperSerializable(object):
     def _set_list_prop(self, k, v, t=None, req=False):
         if req and (v == None):
             raise_with_traceback(ValueError('{0} must have a non-null value'.format(str(k))))
-        elif v:
+        elif v and _validating():
             if not (isinstance(v, collections.MutableSequence)):
                 raise_with_traceback(ValueError('{0} must be a list'.format(str(k))))
             elif t:
@@ -354,89 +1282,164 @@ class CaliperSerializable(object):
     def _set_obj_prop(self, k, v, t=None, req=False):
         if req and (v == None):
             raise_with_traceback(ValueError('{0} must have a non-null value'.format(str(k))))
-        if isinstance(v, BaseEntity) and t and not (is_subtype(v.type, t)):
-            raise_with_traceback(TypeError('Provided property is not of required type: {}'.format(t)))
-        if isinstance(v, str) and t and not is_subtype(t, CaliperSerializable):
-            raise_with_traceback(ValueError('URI IDs can only be provided for objects of known Caliper types'))
+        if t and _validating():
+            if isinstance(v, BaseEntity) and not (is_subtype(v.type, t)):
+                raise_with_traceback(
+                    TypeError('Provided property is not of required type: {}'.format(t)))
+            if isinstance(v, str) and not is_subtype(t, CaliperSerializable):
+                raise_with_traceback(
+                    ValueError('URI IDs can only be provided for objects of known Caliper types'))
         self._update_props(k, v)
 
     def _set_time_prop(self, k, v, req=False):
         val = None
-        if is_valid_time(v):
+        if _validating() and is_valid_time(v):
             val = v
         self._set_untyped_prop(k, v, req=req)
 
     # protected unpacker methods, used by dict and json-string representation
     # public functions
-    def _unpack_context(self, ctxt_bases=[]):
+    def _unpack_context(self, ctxt_bases=_NO_CONTEXTS):
         r = self._get_prop('@context')
-        for ctxt in ctxt_bases:
-            if r == ctxt:
-                return None
-        else:
-            return r
+        if r in ctxt_bases:
+            return None
+        return r
 
+    # with copy_values, the unpacked structure shares no mutable values with this
+    # object's properties; without it, plain dict and list property values are
+    # passed through as they are, which is safe only when the result will not
+    # be modified (as when it is serialized straight away)
     def _unpack_list(self,
                      l,
-                     ctxt_bases=[],
-                     described_objects=[],
+                     ctxt_bases=_NO_CONTEXTS,
+                     described_objects=frozenset(),
                      thin_context=False,
-                     thin_props=False):
+                     thin_props=False,
+                     copy_values=True,
+                     fragment_cache=None,
+                     ids=None):
         r = []
         for item in l:
-            if isinstance(item, collections.MutableSequence):
+            kind = _kind_of(item)[0]
+            if kind == _KIND_LIST:
                 r.append(
                     self._unpack_list(
                         item,
                         ctxt_bases=ctxt_bases,
                         described_objects=described_objects,
                         thin_context=thin_context,
-                        thin_props=thin_props))
-            elif isinstance(item, CaliperSerializable):
+                        thin_props=thin_props,
+                        copy_values=copy_values,
+                        fragment_cache=fragment_cache,
+                        ids=ids))
+                continue
+            elif kind == _KIND_OBJECT:
                 r.append(
                     item._unpack_object(
                         ctxt_bases=ctxt_bases,
                         described_objects=described_objects,
                         thin_context=thin_context,
-                        thin_props=thin_props))
-            else:
+                        thin_props=thin_props,
+                        copy_values=copy_values,
+                        fragment_cache=fragment_cache,
+                        ids=ids))
+                continue
+            elif kind == _KIND_MAPPING and ids is not None:
+                _collect_ids(item, ids)
+            if copy_values:
                 r.append(copy.deepcopy(item))
+            else:
+                r.append(item)
         return r
 
+    # the key for this object's serialized fragment in a fragment cache, or None
+    # if the fragment shouldn't be cached: only entities are, since they're what
+    # recurs across events, and only when the fragment doesn't depend on a list
+    # of described objects, and is not going to be copied anyway
+    def _fragment_key(self, ctxt_bases, described_objects, thin_context, thin_props,
+                      copy_values):
+        if copy_values or described_objects or not isinstance(self, BaseEntity):
+            return None
+        return (id(self), ctxt_bases.keys, thin_context, thin_props)
+
+    # this object and every caliper object nested in its properties, each paired
+    # with its current version
+    def _dependencies(self):
+        deps = []
+        seen = set()
+        stack = [self]
+        while stack:
+            o = stack.pop()
+            if _kind_of(o)[0] == _KIND_LIST:
+                values = o
+            elif id(o) in seen:
+                continue
+            else:
+                seen.add(id(o))
+                deps.append((o, o._version))
+                values = o._props.values()
+            stack.extend(v for v in values if _kind_of(v)[0] in (_KIND_LIST, _KIND_OBJECT))
+        return tuple(deps)
+
     def _unpack_object(self,
-                       ctxt_bases=[],
-                       described_objects=[],
+                       ctxt_bases=_NO_CONTEXTS,
+                       described_objects=frozenset(),
                        thin_context=False,
-                       thin_props=False):
+                       thin_props=False,
+                       copy_values=True,
+                       fragment_cache=None,
+                       ids=None):
+        key = None
+        if fragment_cache is not None:
+            key = self._fragment_key(ctxt_bases, described_objects, thin_context, thin_props,
+                                     copy_values)
+        if key:
+            entry = fragment_cache.get(key)
+            if entry and entry[0] is self and all(o._version == n for o, n in entry[1]):
+                if ids is not None:
+                    ids.extend(entry[3])
+                return entry[2]
+            # taken before unpacking, so that a change made meanwhile leaves the
+            # entry stale rather than wrongly current
+            deps = self._dependencies()
+            # a cached fragment keeps its own ids, for whoever reuses it
+            caller_ids, ids = ids, []
+
         r = {}
-        cb = copy.deepcopy(ctxt_bases)
+        cb = ctxt_bases
         ctxt_prop = self._unpack_context(ctxt_bases=cb)
         if ctxt_prop:
             r.update({'@context': ctxt_prop})
             if thin_context:
                 if not cb:
-                    cb.append(_get_base_context(ctxt_prop))
-                cb.append(ctxt_prop)
+                    cb = cb.push(_get_base_context(ctxt_prop))
+                cb = cb.push(ctxt_prop)
 
-        for k, v in sorted(self._props.items()):
+        props = self._props
+        for k in _get_plan(self).keys_for(props):
             if k == '@context':
                 continue
+            v = props[k]
+            kind, thin = _kind_of(v)
 
-            # handle value based on its type: list, composite, or basic type
-            if thin_props and v in (None, {}, []):
+            # handle value based on its kind: list, composite, or basic type
+            if thin_props and _is_thinned(v, thin):
                 continue
-            elif isinstance(v, collections.MutableSequence):
+            elif kind == _KIND_LIST:
                 value = self._unpack_list(
                     v,
                     ctxt_bases=cb,
                     described_objects=described_objects,
                     thin_context=thin_context,
-                    thin_props=thin_props)
-            elif isinstance(v, CaliperSerializable):
+                    thin_props=thin_props,
+                    copy_values=copy_values,
+                    fragment_cache=fragment_cache,
+                    ids=ids)
+            elif kind == _KIND_OBJECT:
                 the_id = v._get_prop('id')
                 the_type = v._get_prop('type')
                 if (the_id and the_type
-                    and is_subtype(the_type, CaliperSerializable)
+                    and _is_serializable_type(the_type)
                     and the_id in described_objects):
                     value = the_id
                 else:
@@ -444,40 +1447,250 @@ class CaliperSerializable(object):
                         ctxt_bases=cb,
                         described_objects=described_objects,
                         thin_context=thin_context,
-                        thin_props=thin_props)
-            elif isinstance(v, collections.MutableMapping):
+                        thin_props=thin_props,
+                        copy_values=copy_values,
+                        fragment_cache=fragment_cache,
+                        ids=ids)
+            elif kind == _KIND_MAPPING:
                 the_id = v.get('id')
                 the_type = v.get('type')
                 if (the_id and the_type) and (the_id in described_objects):
                     value = the_id
                 else:
                     value = v
+                    if ids is not None:
+                        _collect_ids(v, ids)
             else:
                 value = v
-            r.update({k: value})
-
-        return copy.deepcopy(r)
-
-    # public methods, to repr this event or entity as a dict or as a json-string
-    def as_dict(self, described_objects=None, thin_context=False, thin_props=False):
+                if k == 'id' and ids is not None and v and isinstance(v, str):
+                    ids.append((v, isinstance(self, BaseEvent)))
+            r[k] = value
+
+        if key:
+            fragment_cache.put(key, (self, deps, r, tuple(ids)))
+            if caller_ids is not None:
+                caller_ids.extend(ids)
+        return copy.deepcopy(r) if copy_values else r
+
+    # the dict representation, with the identifiers in it added to ids, if
+    # given, as they're met
+    def _unpack_root(self,
+                     described_objects=None,
+                     thin_context=False,
+                     thin_props=False,
+                     copy_values=True,
+                     ids=None):
         return self._unpack_object(
-            described_objects=described_objects or [],
+            described_objects=_described_set(described_objects),
             thin_context=thin_context,
-            thin_props=thin_props)
+            thin_props=thin_props,
+            copy_values=copy_values,
+            ids=ids)
 
-    def as_json(self, described_objects=None, thin_context=False, thin_props=False):
+    # public methods, to repr this event or entity as a dict or as a json-string
+    def as_dict(self,
+                described_objects=None,
+                thin_context=False,
+                thin_props=False,
+                copy_values=True):
+        return self._unpack_root(
+            described_objects=described_objects,
+            thin_context=thin_context,
+            thin_props=thin_props,
+            copy_values=copy_values)
+
+    # the dict is serialized and discarded at once, so it needn't be copied;
+    # json_backend names the JSON backend to encode with (the standard
+    # library's json module by default); compact drops the whitespace after
+    # separators, and turning sort_keys off skips the sort, leaving keys in the
+    # order they're serialized in (the defaults give the canonical form that
+    # the fixtures use)
+    def as_json(self,
+                described_objects=None,
+                thin_context=False,
+                thin_props=False,
+                json_backend=None,
+                compact=False,
+                sort_keys=True):
         r = self.as_dict(
             described_objects=described_objects,
             thin_context=thin_context,
-            thin_props=thin_props)
-        return json.dumps(r, sort_keys=True)
-
-    def as_json_with_ids(self, described_objects=None, thin_context=False, thin_props=False):
-        ret = self.as_json(
+            thin_props=thin_props,
+            copy_values=False)
+        return get_backend(json_backend, compact=compact, sort_keys=sort_keys).dumps(r)
+
+    # the identifiers are collected while serializing, in the order they appear
+    # in the sorted JSON; with split_ids, they come as a pair of lists, the
+    # event identifiers and the entity identifiers
+    def as_json_with_ids(self,
+                         described_objects=None,
+                         thin_context=False,
+                         thin_props=False,
+                         json_backend=None,
+                         compact=False,
+                         sort_keys=True,
+                         split_ids=False):
+        ids = []
+        r = self._unpack_root(
             described_objects=described_objects,
             thin_context=thin_context,
+            thin_props=thin_props,
+            copy_values=False,
+            ids=ids)
+        ret = get_backend(json_backend, compact=compact, sort_keys=sort_keys).dumps(r)
+        return ret, _split_ids(ids, split_ids)
+
+    # binary representations of the same dict as_json() encodes, for pipelines
+    # that don't need JSON text; each needs its format's package installed
+    def _as_binary(self, binary_format, described_objects, thin_context, thin_props):
+        r = self.as_dict(
+            described_objects=described_objects,
+            thin_context=thin_context,
+            thin_props=thin_props,
+            copy_values=False)
+        return get_format(binary_format).dumps(r)
+
+    def as_cbor(self, described_objects=None, thin_context=False, thin_props=False):
+        return self._as_binary(BINARY_FORMATS['CBOR'], described_objects, thin_context,
+                               thin_props)
+
+    def as_msgpack(self, described_objects=None, thin_context=False, thin_props=False):
+        return self._as_binary(BINARY_FORMATS['MSGPACK'], described_objects, thin_context,
+                               thin_props)
+
+    # protected writer methods, used by the streaming json-string representation;
+    # these follow the same rules as the unpacker methods, but write each value's
+    # JSON text out as they go instead of building a dict to hand to json.dumps
+    def _write_list(self,
+                    write,
+                    l,
+                    ctxt_bases=_NO_CONTEXTS,
+                    described_objects=frozenset(),
+                    thin_context=False,
+                    thin_props=False):
+        write('[')
+        for i, item in enumerate(l):
+            if i:
+                write(', ')
+            kind = _kind_of(item)[0]
+            if kind == _KIND_LIST:
+                self._write_list(
+                    write,
+                    item,
+                    ctxt_bases=ctxt_bases,
+                    described_objects=described_objects,
+                    thin_context=thin_context,
+                    thin_props=thin_props)
+            elif kind == _KIND_OBJECT:
+                item._write_object(
+                    write,
+                    ctxt_bases=ctxt_bases,
+                    described_objects=described_objects,
+                    thin_context=thin_context,
+                    thin_props=thin_props)
+            else:
+                write(_dumps(item))
+        write(']')
+
+    def _write_object(self,
+                      write,
+                      ctxt_bases=_NO_CONTEXTS,
+                      described_objects=frozenset(),
+                      thin_context=False,
+                      thin_props=False):
+        cb = ctxt_bases
+        ctxt_prop = self._unpack_context(ctxt_bases=cb)
+        if ctxt_prop and thin_context:
+            if not cb:
+                cb = cb.push(_get_base_context(ctxt_prop))
+            cb = cb.push(ctxt_prop)
+
+        write('{')
+        first = True
+        props = self._props
+        for k in _get_plan(self).keys_for(props):
+            v = props[k]
+            if k == '@context':
+                if not ctxt_prop:
+                    continue
+                kind, v = _KIND_SCALAR, ctxt_prop
+            else:
+                kind, thin = _kind_of(v)
+                if thin_props and _is_thinned(v, thin):
+                    continue
+            if not first:
+                write(', ')
+            first = False
+            write(_encode_str(k))
+            write(': ')
+            if kind == _KIND_LIST:
+                self._write_list(
+                    write,
+                    v,
+                    ctxt_bases=cb,
+                    described_objects=described_objects,
+                    thin_context=thin_context,
+                    thin_props=thin_props)
+            elif kind == _KIND_OBJECT:
+                the_id = v._get_prop('id')
+                the_type = v._get_prop('type')
+                if (the_id and the_type
+                    and _is_serializable_type(the_type)
+                    and the_id in described_objects):
+                    write(_dumps(the_id))
+                else:
+                    v._write_object(
+                        write,
+                        ctxt_bases=cb,
+                        described_objects=described_objects,
+                        thin_context=thin_context,
+                        thin_props=thin_props)
+            elif kind == _KIND_MAPPING:
+                the_id = v.get('id')
+                the_type = v.get('type')
+                if (the_id and the_type) and (the_id in described_objects):
+                    write(_dumps(the_id))
+                else:
+                    write(_dumps(v))
+            else:
+                write(_dumps(v))
+        write('}')
+
+    # the constructor arguments that build this object afresh
+    def _init_kwargs(self):
+        return dict(('context' if k == '@context' else k, v) for k, v in self._props.items()
+                    if k != 'type')
+
+    # run all the checks on this object and the caliper objects it holds, by
+    # building each afresh from its properties at the strict level, whatever the
+    # level they were built at; raises what the constructor would, or ValueError
+    # for a property the constructor would have dropped
+    def validate(self):
+        with validation_level(VALIDATION_LEVELS['STRICT']):
+            self._validate(set())
+        return True
+
+    def _validate(self, seen):
+        if id(self) in seen:
+            return
+        seen.add(id(self))
+        for v in self._props.values():
+            _validate_nested(v, seen)
+        rebuilt = self.__class__(**self._init_kwargs())
+        for k, v in self._props.items():
+            if rebuilt._get_prop(k) != v:
+                raise_with_traceback(ValueError('{0} does not have a valid value'.format(str(k))))
+
+    # write the same JSON text as_json returns into sink (a bytearray or a
+    # file-like object), without first building the whole object as a dict
+    def write_json(self, sink, described_objects=None, thin_context=False, thin_props=False):
+        s = _JsonSink(sink)
+        self._write_object(
+            s.write,
+            described_objects=_described_set(described_objects),
+            thin_context=thin_context,
             thin_props=thin_props)
-        return ret, re.findall(r'"id": "(.+?(?="))"', re.sub(r'"@context": \[.+?\],', '', ret))
+        s.flush()
 
 
 ### Entities and Events ###
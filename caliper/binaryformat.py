@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, binary format module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import raise_with_traceback
+from builtins import *
+
+from caliper.constants import BINARY_FORMATS
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+## Binary encoding and decoding of the same dicts the JSON backends work with,
+# for pipelines where JSON text is wasteful; each format needs its library
+# installed, and decodes back to the dicts and lists the condensor reads
+class MsgpackFormat(object):
+    name = BINARY_FORMATS['MSGPACK']
+    package = 'msgpack'
+
+    @staticmethod
+    def available():
+        return msgpack is not None
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, b):
+        return msgpack.unpackb(b, raw=False)
+
+
+class CborFormat(object):
+    name = BINARY_FORMATS['CBOR']
+    package = 'cbor2'
+
+    @staticmethod
+    def available():
+        return cbor2 is not None
+
+    def dumps(self, obj):
+        return cbor2.dumps(obj)
+
+    def loads(self, b):
+        return cbor2.loads(b)
+
+
+_FORMATS = [MsgpackFormat, CborFormat]
+_instances = {}
+
+
+## The format for a BINARY_FORMATS value; unlike the JSON backends there's
+# nothing to fall back to, so a format that isn't installed is an error
+def get_format(name):
+    if name not in _instances:
+        matches = [f for f in _FORMATS if f.name == name]
+        if not matches:
+            raise_with_traceback(ValueError('Unknown binary format: {0}'.format(str(name))))
+        if not matches[0].available():
+            raise_with_traceback(
+                ImportError('binary format {0} needs the {1} package installed'.format(
+                    name, matches[0].package)))
+        _instances[name] = matches[0]()
+    return _instances[name]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, circuit breaker module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from builtins import *
+
+import collections, threading, time
+
+from caliper.constants import CIRCUIT_STATE
+
+
+## Circuit breaker guarding calls to one event store endpoint.
+# Outcomes of the last window calls are kept in a sliding window; a call fails
+# if it reports failure or takes longer than slow_call_duration milliseconds.
+# Once at least min_calls outcomes are in the window and failure_rate percent
+# of them failed, the circuit opens and allow() refuses calls for open_duration
+# milliseconds. After that the circuit is half-open: half_open_calls trial calls
+# are let through, and the circuit closes again if they all succeed, or re-opens
+# on the first failure. on_state_change(state), if given, is called with the new
+# state on every transition.
+class CircuitBreaker(object):
+    def __init__(self,
+                 failure_rate=50,
+                 window=20,
+                 min_calls=10,
+                 slow_call_duration=0,
+                 open_duration=30000,
+                 half_open_calls=1,
+                 on_state_change=None):
+        self._failure_rate = failure_rate / 100.0
+        self._min_calls = min(min_calls, window)
+        self._slow_call_duration = slow_call_duration / 1000.0
+        self._open_duration = open_duration / 1000.0
+        self._half_open_calls = half_open_calls
+        self._on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._outcomes = collections.deque(maxlen=window)
+        self._state = CIRCUIT_STATE['CLOSED']
+        self._opened_at = None
+        self._trials = 0
+        self._trial_successes = 0
+
+    @staticmethod
+    def from_options(options, on_state_change=None):
+        return CircuitBreaker(
+            failure_rate=options.CIRCUIT_FAILURE_RATE,
+            window=options.CIRCUIT_WINDOW,
+            min_calls=options.CIRCUIT_MIN_CALLS,
+            slow_call_duration=options.CIRCUIT_SLOW_CALL_DURATION,
+            open_duration=options.CIRCUIT_OPEN_DURATION,
+            half_open_calls=options.CIRCUIT_HALF_OPEN_CALLS,
+            on_state_change=on_state_change)
+
+    @property
+    def state(self):
+        with self._lock:
+            self._expire_open()
+            return self._state
+
+    # caller must hold the lock; returns the new state, so that the caller can
+    # report it once the lock is released
+    def _transition(self, state):
+        self._state = state
+        self._trials = 0
+        self._trial_successes = 0
+        if state == CIRCUIT_STATE['OPEN']:
+            self._opened_at = time.time()
+        elif state == CIRCUIT_STATE['CLOSED']:
+            self._outcomes.clear()
+        return state
+
+    def _expire_open(self):
+        if (self._state == CIRCUIT_STATE['OPEN']
+                and (time.time() - self._opened_at) >= self._open_duration):
+            return self._transition(CIRCUIT_STATE['HALF_OPEN'])
+        return None
+
+    def _notify(self, state):
+        if state and self._on_state_change:
+            self._on_state_change(state)
+
+    def allow(self):
+        with self._lock:
+            changed = self._expire_open()
+            if self._state == CIRCUIT_STATE['CLOSED']:
+                allowed = True
+            elif self._state == CIRCUIT_STATE['HALF_OPEN']:
+                allowed = self._trials < self._half_open_calls
+                if allowed:
+                    self._trials += 1
+            else:
+                allowed = False
+        self._notify(changed)
+        return allowed
+
+    # record the outcome of a call that allow() let through; duration is in seconds
+    def record(self, success, duration=0.0):
+        if self._slow_call_duration and duration > self._slow_call_duration:
+            success = False
+        changed = None
+        with self._lock:
+            if self._state == CIRCUIT_STATE['HALF_OPEN']:
+                if not success:
+                    changed = self._transition(CIRCUIT_STATE['OPEN'])
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self._half_open_calls:
+                        changed = self._transition(CIRCUIT_STATE['CLOSED'])
+            elif self._state == CIRCUIT_STATE['CLOSED']:
+                self._outcomes.append(success)
+                failures = self._outcomes.count(False)
+                if (len(self._outcomes) >= self._min_calls
+                        and failures >= self._failure_rate * len(self._outcomes)):
+                    changed = self._transition(CIRCUIT_STATE['OPEN'])
+        self._notify(changed)
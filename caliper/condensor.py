@@ -26,19 +26,38 @@ from builtins import *
 
 import copy, collections, importlib
 
-from caliper.base import is_valid_URI, is_valid_date
-from caliper.constants import CALIPER_CLASSES
+from caliper.base import _validation_boundary, is_valid_URI, is_valid_date
+from caliper.binaryformat import get_format
+from caliper.constants import BINARY_FORMATS, CALIPER_CLASSES
+from caliper.jsonbackend import get_backend
 
 
+# the public functions are where objects come into the package, so at the
+# boundary validation level the objects they build get the strict checks
 def from_caliper_envelope(d):
+    with _validation_boundary():
+        return _from_caliper_envelope(d)
+
+
+def from_json_dict(d):
+    with _validation_boundary():
+        return _from_json_dict(d)
+
+
+def from_json_list(l):
+    with _validation_boundary():
+        return _from_json_list(l)
+
+
+def _from_caliper_envelope(d):
     r = None
     if (is_valid_URI(d.get('sensor')) and is_valid_date(d.get('sendTime')) and
             isinstance(d.get('data'), collections.MutableSequence)):
-        r = from_json_list(d.get('data'))
+        r = _from_json_list(d.get('data'))
     return r
 
 
-def from_json_dict(d):
+def _from_json_dict(d):
     t = d.get('type')
     if t and not CALIPER_CLASSES.get(t):
         return copy.deepcopy(d)
@@ -61,9 +80,9 @@ def from_json_dict(d):
         elif k in ['@context']:
             value = v
         elif isinstance(v, collections.MutableSequence):
-            value = from_json_list(v)
+            value = _from_json_list(v)
         elif isinstance(v, collections.MutableMapping) and CALIPER_CLASSES.get(v.get('type')):
-            value = from_json_dict(v)
+            value = _from_json_dict(v)
         else:
             value = v
 
@@ -80,14 +99,36 @@ def from_json_dict(d):
     return TheClass(**r)
 
 
-def from_json_list(l):
+def _from_json_list(l):
     r = []
     for item in l:
         if isinstance(item, collections.MutableSequence):
-            r.append(from_json_list(item))
+            r.append(_from_json_list(item))
         elif isinstance(item, collections.MutableMapping):
-            r.append(from_json_dict(item))
+            r.append(_from_json_dict(item))
         else:
             r.append(item)
     return r or None
 
+
+def _from_decoded(d):
+    if isinstance(d, collections.MutableSequence):
+        return from_json_list(d)
+    elif 'sendTime' in d and 'data' in d:
+        return from_caliper_envelope(d)
+    return from_json_dict(d)
+
+
+# decode a JSON string with the named JSON backend, and condense the result:
+# an envelope condenses to the list of its data items
+def from_json(s, json_backend=None):
+    return _from_decoded(get_backend(json_backend).loads(s))
+
+
+# decode and condense the output of as_cbor() and as_msgpack() in the same way
+def from_cbor(b):
+    return _from_decoded(get_format(BINARY_FORMATS['CBOR']).loads(b))
+
+
+def from_msgpack(b):
+    return _from_decoded(get_format(BINARY_FORMATS['MSGPACK']).loads(b))
@@ -568,3 +568,35 @@ CALIPER_ACTIONS.update(GRADING_PROFILE_ACTIONS)
 CALIPER_ACTIONS.update(READING_PROFILE_ACTIONS)
 CALIPER_ACTIONS.update(SESSION_PROFILE_ACTIONS)
 CALIPER_ACTIONS.update(TOOL_USE_PROFILE_ACTIONS)
+
+## Sensor transport settings
+PAYLOAD_COMPRESSION = {
+    'NONE': 'none',
+    'DEFLATE': 'deflate',
+    'GZIP': 'gzip',
+}
+
+CIRCUIT_STATE = {
+    'CLOSED': 'closed',
+    'HALF_OPEN': 'half-open',
+    'OPEN': 'open',
+}
+
+JSON_BACKENDS = {
+    'AUTO': 'auto',
+    'ORJSON': 'orjson',
+    'RAPIDJSON': 'rapidjson',
+    'STDLIB': 'stdlib',
+    'UJSON': 'ujson',
+}
+
+BINARY_FORMATS = {
+    'CBOR': 'cbor',
+    'MSGPACK': 'msgpack',
+}
+
+VALIDATION_LEVELS = {
+    'BOUNDARY': 'boundary',
+    'STRICT': 'strict',
+    'TRUSTED': 'trusted',
+}
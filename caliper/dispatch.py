@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, dispatch module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from builtins import *
+
+import collections, queue, threading, time
+from concurrent.futures import Future
+
+
+class _PendingSend(object):
+    def __init__(self, events, described_objects, sensor_id, future):
+        self.events = events
+        self.described_objects = described_objects
+        self.sensor_id = sensor_id
+        self.future = future
+
+    @property
+    def batch_key(self):
+        # only sends with the same envelope settings can share an envelope
+        return (self.sensor_id, frozenset(self.described_objects or ()))
+
+
+class _Control(object):
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+## Buffers sends in a bounded queue and delivers them from a background thread.
+# Pending sends are flushed as multi-event envelopes once max_events events have
+# accumulated, or once the oldest pending send is max_age milliseconds old. Each
+# send gets a future resolving to the identifiers that deliver() returned for the
+# envelope the send went out in. Sends that arrive while the queue is full are
+# handed to overflow(), if given; their futures resolve to no identifiers when
+# overflow() returns True, and fail with queue.Full otherwise.
+class BatchingDispatcher(object):
+    def __init__(self, deliver, max_events=100, max_age=1000, queue_size=10000, overflow=None):
+        self._deliver = deliver
+        self._overflow = overflow
+        self._max_events = max_events
+        self._max_age = max_age / 1000.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    # called with the lock held
+    def _ensure_started(self):
+        if not (self._thread and self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='caliper-dispatcher')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def submit(self, events=None, described_objects=None, sensor_id=None):
+        f = Future()
+        f.set_running_or_notify_cancel()
+        # enqueue under the lock, so that nothing lands behind the stop control
+        # that close() puts on the queue
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('cannot submit sends to a closed dispatcher')
+            self._ensure_started()
+            try:
+                self._queue.put_nowait(_PendingSend(events, described_objects, sensor_id, f))
+                return f
+            except queue.Full:
+                pass
+        if self._overflow and self._overflow(events, described_objects, sensor_id):
+            f.set_result([])
+        else:
+            f.set_exception(queue.Full('dispatch queue is full; events were not sent'))
+        return f
+
+    def _control(self, stop=False):
+        with self._lock:
+            running = self._thread and self._thread.is_alive()
+        if not running:
+            return
+        c = _Control(stop=stop)
+        self._queue.put(c)
+        c.done.wait()
+
+    def flush(self):
+        self._control()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._control(stop=True)
+
+    def _run(self):
+        pending = []
+        count = 0
+        deadline = None
+        while True:
+            timeout = None if not pending else max(0.0, deadline - time.time())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _PendingSend):
+                if not pending:
+                    deadline = time.time() + self._max_age
+                pending.append(item)
+                count += len(item.events)
+                if count < self._max_events:
+                    continue
+
+            self._flush(pending)
+            pending = []
+            count = 0
+            if isinstance(item, _Control):
+                item.done.set()
+                if item.stop:
+                    return
+
+    def _flush(self, pending):
+        batches = collections.OrderedDict()
+        for p in pending:
+            batches.setdefault(p.batch_key, []).append(p)
+        for batch in batches.values():
+            events = []
+            for p in batch:
+                events += p.events
+            try:
+                identifiers = self._deliver(
+                    events=events,
+                    described_objects=batch[0].described_objects,
+                    sensor_id=batch[0].sensor_id)
+            except Exception as e:
+                for p in batch:
+                    p.future.set_exception(e)
+            else:
+                for p in batch:
+                    p.future.set_result(identifiers)
@@ -34,7 +34,7 @@ from caliper.constants import (
     ASSESSMENT_ITEM_EVENT_ACTIONS, ASSIGNABLE_EVENT_ACTIONS, FORUM_EVENT_ACTIONS,
     GRADE_EVENT_ACTIONS, MEDIA_EVENT_ACTIONS, MESSAGE_EVENT_ACTIONS, NAVIGATION_EVENT_ACTIONS,
     SESSION_EVENT_ACTIONS, THREAD_EVENT_ACTIONS, TOOL_USE_EVENT_ACTIONS, VIEW_EVENT_ACTIONS)
-from caliper.base import BaseEntity, BaseEvent, ensure_type
+from caliper.base import BaseEntity, BaseEvent, _validating, ensure_type
 
 ## Base event class
 class Event(BaseEvent):
@@ -57,7 +57,7 @@ class Event(BaseEvent):
                  target=None):
         BaseEvent.__init__(self, context=context)
         self._set_id(id or 'urn:uuid:{}'.format(uuid.uuid4()))
-        if action and (action not in CALIPER_ACTIONS.values()):
+        if _validating() and action and (action not in CALIPER_ACTIONS.values()):
             raise_with_traceback(ValueError('action must be in the list of Caliper actions'))
         else:
             self._set_str_prop('action', action, req=True)
@@ -144,7 +144,7 @@ class MinimalEvent(BaseEvent):
         self._set_date_prop('eventTime', eventTime, req=True)
         self._set_obj_prop('object', object, t=ENTITY_TYPES['ENTITY'])
 
-        if action and (action not in BASIC_EVENT_ACTIONS.values()):
+        if _validating() and action and (action not in BASIC_EVENT_ACTIONS.values()):
             raise_with_traceback(ValueError('action must be in the list of Caliper actions'))
         else:
             self._set_str_prop('action', action, req=True)
@@ -174,7 +174,7 @@ class MinimalEvent(BaseEvent):
 class AnnotationEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in ANNOTATION_EVENT_ACTIONS.values():
+        if _validating() and self.action not in ANNOTATION_EVENT_ACTIONS.values():
             raise_with_traceback(
                 ValueError('action must be in the list of Annotation event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
@@ -185,7 +185,7 @@ class AnnotationEvent(Event):
 class AssessmentEvent(Event):
     def __init__(self, target=None, **kwargs):
         Event.__init__(self, target=None, **kwargs)
-        if self.action not in ASSESSMENT_EVENT_ACTIONS.values():
+        if _validating() and self.action not in ASSESSMENT_EVENT_ACTIONS.values():
             raise_with_traceback(
                 ValueError('action must be in the list of Assessment Item event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
@@ -196,7 +196,7 @@ class AssessmentEvent(Event):
 class AssessmentItemEvent(Event):
     def __init__(self, target=None, **kwargs):
         Event.__init__(self, target=None, **kwargs)
-        if self.action not in ASSESSMENT_ITEM_EVENT_ACTIONS.values():
+        if _validating() and self.action not in ASSESSMENT_ITEM_EVENT_ACTIONS.values():
             raise_with_traceback(
                 ValueError('action must be in the list of Assessment event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
@@ -210,7 +210,7 @@ class AssessmentItemEvent(Event):
 class AssignableEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in ASSIGNABLE_EVENT_ACTIONS.values():
+        if _validating() and self.action not in ASSIGNABLE_EVENT_ACTIONS.values():
             raise_with_traceback(
                 ValueError('action must be in the list of Assignable event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
@@ -221,7 +221,7 @@ class AssignableEvent(Event):
 class ForumEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in FORUM_EVENT_ACTIONS.values():
+        if _validating() and self.action not in FORUM_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of Forum event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['FORUM'])
@@ -233,14 +233,14 @@ class GradeEvent(Event):
         if self.action == GRADE_EVENT_ACTIONS['GRADED']:
             ensure_type(self.object, ENTITY_TYPES['ATTEMPT'])
             ensure_type(self.generated, ENTITY_TYPES['SCORE'])
-        else:
+        elif _validating():
             raise_with_traceback(ValueError('action must be in the list of Outcome event actions'))
 
 
 class MediaEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in MEDIA_EVENT_ACTIONS.values():
+        if _validating() and self.action not in MEDIA_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of Media event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['MEDIA_OBJECT'])
@@ -250,7 +250,7 @@ class MediaEvent(Event):
 class MessageEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in MESSAGE_EVENT_ACTIONS.values():
+        if _validating() and self.action not in MESSAGE_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of Message event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['MESSAGE'])
@@ -259,7 +259,7 @@ class MessageEvent(Event):
 class NavigationEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in NAVIGATION_EVENT_ACTIONS.values():
+        if _validating() and self.action not in NAVIGATION_EVENT_ACTIONS.values():
             raise_with_traceback(
                 ValueError('action must be in the list of Navigation event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
@@ -282,14 +282,14 @@ class SessionEvent(Event):
         elif self.action == SESSION_EVENT_ACTIONS['TIMED_OUT']:
             ensure_type(self.actor, ENTITY_TYPES['SOFTWARE_APPLICATION'])
             ensure_type(self.object, ENTITY_TYPES['SESSION'])
-        else:
+        elif _validating():
             raise_with_traceback(ValueError('action must be in the list of Session event actions'))
 
 
 class ThreadEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in THREAD_EVENT_ACTIONS.values():
+        if _validating() and self.action not in THREAD_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of Thread event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['THREAD'])
@@ -298,7 +298,7 @@ class ThreadEvent(Event):
 class ToolUseEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in TOOL_USE_EVENT_ACTIONS.values():
+        if _validating() and self.action not in TOOL_USE_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of Tool Use event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['SOFTWARE_APPLICATION'])
@@ -308,7 +308,7 @@ class ToolUseEvent(Event):
 class ViewEvent(Event):
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
-        if self.action not in VIEW_EVENT_ACTIONS.values():
+        if _validating() and self.action not in VIEW_EVENT_ACTIONS.values():
             raise_with_traceback(ValueError('action must be in the list of View event actions'))
         ensure_type(self.actor, ENTITY_TYPES['PERSON'])
         ensure_type(self.object, ENTITY_TYPES['DIGITAL_RESOURCE'])
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, JSON backend module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import raise_with_traceback
+from builtins import *
+
+import json, logging
+
+from caliper.constants import JSON_BACKENDS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import rapidjson
+except ImportError:
+    rapidjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+
+## JSON encoding and decoding through the standard library's json module. By
+# default every backend sorts object keys, so that output keeps the key order
+# of the fixtures; with sort_keys off, keys are written in the order the dict
+# holds them, which for serialized caliper objects is already the sorted order.
+# Each backend reports the separators it writes, so that callers assembling
+# JSON text around its output can match them; compact drops the whitespace
+# after them, for the backends that write any.
+class JsonBackend(object):
+    name = JSON_BACKENDS['STDLIB']
+
+    def __init__(self, compact=False, sort_keys=True):
+        self.sort_keys = sort_keys
+        if compact:
+            self.item_separator, self.key_separator = ',', ':'
+        else:
+            self.item_separator, self.key_separator = ', ', ': '
+
+    @staticmethod
+    def available():
+        return True
+
+    def dumps(self, obj):
+        return json.dumps(
+            obj,
+            sort_keys=self.sort_keys,
+            separators=(self.item_separator, self.key_separator))
+
+    def loads(self, s):
+        return json.loads(s)
+
+
+class OrjsonBackend(JsonBackend):
+    name = JSON_BACKENDS['ORJSON']
+
+    def __init__(self, compact=False, sort_keys=True):
+        self.sort_keys = sort_keys
+        self.item_separator, self.key_separator = ',', ':'
+        self._option = orjson.OPT_SORT_KEYS if sort_keys else 0
+
+    @staticmethod
+    def available():
+        return orjson is not None
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=self._option).decode('utf-8')
+
+    def loads(self, s):
+        return orjson.loads(s)
+
+
+class RapidjsonBackend(JsonBackend):
+    name = JSON_BACKENDS['RAPIDJSON']
+
+    def __init__(self, compact=False, sort_keys=True):
+        self.sort_keys = sort_keys
+        self.item_separator, self.key_separator = ',', ':'
+
+    @staticmethod
+    def available():
+        return rapidjson is not None
+
+    def dumps(self, obj):
+        return rapidjson.dumps(obj, sort_keys=self.sort_keys)
+
+    def loads(self, s):
+        return rapidjson.loads(s)
+
+
+class UjsonBackend(JsonBackend):
+    name = JSON_BACKENDS['UJSON']
+
+    def __init__(self, compact=False, sort_keys=True):
+        self.sort_keys = sort_keys
+        self.item_separator, self.key_separator = ',', ':'
+
+    @staticmethod
+    def available():
+        return ujson is not None
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, sort_keys=self.sort_keys, escape_forward_slashes=False)
+
+    def loads(self, s):
+        return ujson.loads(s)
+
+
+# in order of preference when the backend is left to choose itself
+_BACKENDS = [OrjsonBackend, RapidjsonBackend, UjsonBackend, JsonBackend]
+_instances = {}
+
+
+## The backend for a JSON_BACKENDS value: 'auto' picks the fastest one installed;
+# a backend that is named but not installed falls back to the standard library
+def get_backend(name=None, compact=False, sort_keys=True):
+    name = name or JSON_BACKENDS['STDLIB']
+    key = (name, bool(compact), bool(sort_keys))
+    if key not in _instances:
+        if name == JSON_BACKENDS['AUTO']:
+            cls = [b for b in _BACKENDS if b.available()][0]
+        else:
+            matches = [b for b in _BACKENDS if b.name == name]
+            if not matches:
+                raise_with_traceback(ValueError('Unknown JSON backend: {0}'.format(str(name))))
+            cls = matches[0]
+            if not cls.available():
+                logger.warning('JSON backend {0} is not installed; using {1}'.format(
+                    name, JSON_BACKENDS['STDLIB']))
+                cls = JsonBackend
+        _instances[key] = cls(compact=compact, sort_keys=sort_keys)
+    return _instances[key]
@@ -24,10 +24,21 @@ install_aliases()
 from future.utils import raise_with_traceback
 from builtins import *
 
-import collections, copy, datetime, json, requests
+import collections, contextlib, datetime, email.utils, json, logging, random, requests
+import threading, time, zlib
 
-from caliper.base import CaliperSerializable, HttpOptions
-from caliper.constants import CALIPER_VERSION
+from caliper.base import (CaliperSerializable, HttpOptions, _NO_CONTEXTS, _described_set,
+                          _split_ids, ensure_list_type, get_validation_level)
+from caliper.constants import CALIPER_VERSION, PAYLOAD_COMPRESSION
+from caliper.jsonbackend import get_backend
+from caliper.spool import Spool, SpoolReplayer
+from caliper.util.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _utf8_len(s):
+    return len(s.encode('utf-8'))
 
 
 class Envelope(CaliperSerializable):
@@ -43,6 +54,14 @@ class Envelope(CaliperSerializable):
         self._set_date_prop('sendTime', send_time)
         self._set_str_prop('sensor', sensor_id)
 
+    def _init_kwargs(self):
+        return {
+            'data': self.data,
+            'dataVersion': self.dataVersion,
+            'send_time': self.sendTime,
+            'sensor_id': self.sensor
+        }
+
     @property
     def data(self):
         return self._get_prop('data')
@@ -73,20 +92,208 @@ class Envelope(CaliperSerializable):
 
     # override because Envelopes should only specially serialize
     # their data property's contents
-    def as_dict(self, described_objects=None, thin_context=False, thin_props=False):
-        return copy.deepcopy({
-            'sendTime': self.sendTime,
-            'sensor': self.sensor,
-            'dataVersion': self.dataVersion,
+    def _unpack_root(self,
+                     described_objects=None,
+                     thin_context=False,
+                     thin_props=False,
+                     copy_values=True,
+                     ids=None):
+        # keys in sorted order, so that output that isn't sorted matches output that is
+        return {
             'data': self._unpack_list(
                 self.data,
-                described_objects=described_objects or [],
+                described_objects=_described_set(described_objects),
                 thin_context=thin_context,
-                thin_props=thin_props)
-        })
+                thin_props=thin_props,
+                copy_values=copy_values,
+                ids=ids),
+            'dataVersion': self.dataVersion,
+            'sendTime': self.sendTime,
+            'sensor': self.sensor
+        }
+
+    def _write_object(self,
+                      write,
+                      ctxt_bases=_NO_CONTEXTS,
+                      described_objects=frozenset(),
+                      thin_context=False,
+                      thin_props=False):
+        write('{"data": ')
+        self._write_list(
+            write,
+            self.data,
+            described_objects=described_objects,
+            thin_context=thin_context,
+            thin_props=thin_props)
+        write(', ')
+        write(
+            json.dumps(
+                {
+                    'sendTime': self.sendTime,
+                    'sensor': self.sensor,
+                    'dataVersion': self.dataVersion
+                },
+                sort_keys=True)[1:])
+
+    # splits the envelope's data across as many envelopes as it takes to keep
+    # each under max_bytes and max_items (zero for no limit); every data item is
+    # serialized exactly once and the envelope JSON is assembled around the
+    # items, so the sizes are exact and the output matches as_json()
+    def as_json_chunks_with_ids(self,
+                                max_bytes=0,
+                                max_items=0,
+                                described_objects=None,
+                                thin_context=False,
+                                thin_props=False,
+                                json_backend=None,
+                                fragment_cache=None,
+                                compact=False,
+                                sort_keys=True,
+                                split_ids=False):
+        backend = get_backend(json_backend, compact=compact, sort_keys=sort_keys)
+        described_objects = _described_set(described_objects)
+        items = []
+        item_ids = []
+        for d in self.data or []:
+            ids = []
+            items.append(backend.dumps(self._unpack_list(
+                [d],
+                described_objects=described_objects,
+                thin_context=thin_context,
+                thin_props=thin_props,
+                copy_values=False,
+                fragment_cache=fragment_cache,
+                ids=ids)[0]))
+            item_ids.append(ids)
+        # 'data' sorts ahead of the envelope's other keys
+        sep = backend.item_separator
+        head = '{"data"' + backend.key_separator + '['
+        tail = ']' + sep + backend.dumps({
+            'dataVersion': self.dataVersion,
+            'sendTime': self.sendTime,
+            'sensor': self.sensor
+        })[1:]
+
+        # sizes are counted in bytes of UTF-8, as the payload is sent, since a
+        # backend may write non-ASCII characters unescaped
+        sep_size = _utf8_len(sep)
+        base_size = _utf8_len(head) + _utf8_len(tail)
+        chunks = []
+        current = []
+        size = base_size
+        for i, item in enumerate(items):
+            item_size = _utf8_len(item)
+            extra = item_size + (sep_size if current else 0)
+            if current and ((max_items and len(current) >= max_items) or
+                            (max_bytes and size + extra > max_bytes)):
+                chunks.append(current)
+                current = []
+                size = base_size
+                extra = item_size
+            current.append(i)
+            size += extra
+        if current or not chunks:
+            chunks.append(current)
+
+        r = []
+        for chunk in chunks:
+            payload = head + sep.join(items[i] for i in chunk) + tail
+            ids = [the_id for i in chunk for the_id in item_ids[i]]
+            r.append((payload, _split_ids(ids, split_ids), len(chunk)))
+        return r
+
+
+## Retry policy for envelope delivery: exponential backoff with full jitter, retrying
+# only responses that might succeed on a later attempt (429 and the transient 5xx
+# statuses, honouring any Retry-After header), up to limit retries and time_limit
+# milliseconds in total; permanent server errors such as 501 aren't retried
+class RetryPolicy(object):
+    _RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, limit=0, backoff=100, backoff_max=10000, time_limit=30000):
+        self._limit = limit
+        self._backoff = backoff / 1000.0
+        self._backoff_max = backoff_max / 1000.0
+        self._time_limit = time_limit / 1000.0
+
+    @staticmethod
+    def from_options(options):
+        return RetryPolicy(
+            limit=options.RETRY_LIMIT,
+            backoff=options.RETRY_BACKOFF,
+            backoff_max=options.RETRY_BACKOFF_MAX,
+            time_limit=options.RETRY_TIME_LIMIT)
+
+    # a status of None stands for a transport failure (refused connection,
+    # timeout), which is just as transient as a 503
+    def is_retryable(self, status):
+        return (status is None) or (status in self._RETRYABLE_STATUSES)
+
+    def parse_retry_after(self, value):
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            when = email.utils.parsedate_tz(value)
+            if when:
+                return max(0.0, email.utils.mktime_tz(when) - time.time())
+        return None
+
+    # seconds to wait before retrying, or None if delivery should be abandoned
+    def next_delay(self, attempt, status, started, retry_after=None):
+        if attempt >= self._limit or not self.is_retryable(status):
+            return None
+        delay = self.parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, min(self._backoff_max, self._backoff * (2**attempt)))
+        if (time.time() - started) + delay > self._time_limit:
+            return None
+        return delay
+
+
+class _PayloadCacheEntry(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built = False
+        self.value = None
+
+
+## Shares the work of serializing one send among all the clients of a sensor.
+# Values are built once per key, by the first caller to ask for them; any other
+# caller asking for the same key meanwhile waits for that value rather than
+# building its own. A cache is meant to live for a single sensor send or describe.
+class PayloadCache(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PayloadCacheEntry()
+        with entry.lock:
+            if not entry.built:
+                entry.value = build()
+                entry.built = True
+            return entry.value
+
+    # clients checking at different validation levels don't share results
+    def ensure_list_type(self, objects, cls, validate=False):
+        return self.get(('ensure_list_type', cls, validate, get_validation_level()),
+                        lambda: ensure_list_type(objects, cls, validate=validate))
 
 
 class EventStoreRequestor(object):
+    # cache of serialized entity fragments, shared by everything this
+    # requestor serializes
+    _fragment_cache = None
+
+    # requestors whose describe() and send() take a payload_cache argument,
+    # to share serialized payloads with the other clients of a sensor, say so
+    _accepts_payload_cache = False
+
     def describe(self, caliper_entity_list=None, sensor_id=None):
         raise_with_traceback(
             NotImplementedError('Instance must implement EventStoreRequester.describe()'))
@@ -95,6 +302,11 @@ class EventStoreRequestor(object):
         raise_with_traceback(
             NotImplementedError('Instance must implement EventStoreRequester.send()'))
 
+    # requestors that can keep undeliverable events for later delivery override
+    # this to do so, returning True once the events are safely kept
+    def spool(self, caliper_event_list=None, described_objects=None, sensor_id=None):
+        return False
+
     def _get_time(self):
         return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
 
@@ -109,6 +321,95 @@ class EventStoreRequestor(object):
                                               sensor_id)
         return {'type': '{}'.format('application/json'), 'data': payload}, ids
 
+    # like _generate_payload, but returns a (payload, ids, item count) tuple for
+    # each envelope the objects were split across
+    def _generate_payloads(self,
+                           caliper_objects=None,
+                           described_objects=None,
+                           optimize=False,
+                           send_time=None,
+                           sensor_id=None,
+                           max_bytes=0,
+                           max_items=0,
+                           json_backend=None,
+                           fragment_cache=None,
+                           compact=False,
+                           sort_keys=True):
+        st = send_time if send_time else self._get_time()
+        envelope = Envelope(data=caliper_objects, send_time=st, sensor_id=sensor_id)
+        return [({
+            'type': '{}'.format('application/json'),
+            'data': payload
+        }, ids, count) for payload, ids, count in envelope.as_json_chunks_with_ids(
+            max_bytes=max_bytes,
+            max_items=max_items,
+            described_objects=described_objects,
+            thin_context=optimize,
+            thin_props=optimize,
+            json_backend=json_backend,
+            fragment_cache=fragment_cache,
+            compact=compact,
+            sort_keys=sort_keys)]
+
+    # compress the payload's body when it is at least threshold bytes long; the
+    # compressed payload carries the encoding for the Content-Encoding header
+    def _compress_payload(self, payload, compression=None, threshold=0):
+        body = payload['data']
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        r = {'type': payload['type'], 'data': body}
+        if compression in (None, PAYLOAD_COMPRESSION['NONE']) or (len(body) < threshold):
+            return r
+        elif compression == PAYLOAD_COMPRESSION['GZIP']:
+            c = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            r['data'] = c.compress(body) + c.flush()
+        elif compression == PAYLOAD_COMPRESSION['DEFLATE']:
+            r['data'] = zlib.compress(body)
+        else:
+            raise_with_traceback(ValueError('Unknown compression: {0}'.format(str(compression))))
+        r['encoding'] = compression
+        return r
+
+    # serialized, compressed payloads ready to post, with their ids and event
+    # counts, for requestors configured with HttpOptions; payloads come from the
+    # payload cache when one is given, so that requestors with the same
+    # serialization settings share them
+    def _payloads(self,
+                  caliper_objects=None,
+                  described_objects=None,
+                  sensor_id=None,
+                  payload_cache=None):
+        options = self._options
+        described_objects = _described_set(described_objects)
+        key = (options.OPTIMIZE_SERIALIZATION, sensor_id, described_objects,
+               options.MAX_ENVELOPE_BYTES, options.MAX_EVENTS_PER_ENVELOPE,
+               options.JSON_BACKEND, options.JSON_COMPACT, options.JSON_SORT_KEYS)
+
+        def serialize():
+            return self._generate_payloads(
+                caliper_objects=caliper_objects,
+                described_objects=described_objects,
+                optimize=options.OPTIMIZE_SERIALIZATION,
+                sensor_id=sensor_id,
+                max_bytes=options.MAX_ENVELOPE_BYTES,
+                max_items=options.MAX_EVENTS_PER_ENVELOPE,
+                json_backend=options.JSON_BACKEND,
+                fragment_cache=self._fragment_cache,
+                compact=options.JSON_COMPACT,
+                sort_keys=options.JSON_SORT_KEYS)
+
+        def compress():
+            payloads = payload_cache.get(key, serialize) if payload_cache else serialize()
+            return [(self._compress_payload(
+                payload, compression=options.COMPRESSION,
+                threshold=options.COMPRESSION_THRESHOLD), ids, count)
+                    for payload, ids, count in payloads]
+
+        if not payload_cache:
+            return compress()
+        return payload_cache.get(key + (options.COMPRESSION, options.COMPRESSION_THRESHOLD),
+                                 compress)
+
     def _get_payload_json(self,
                           caliper_objects=None,
                           described_objects=None,
@@ -122,6 +423,8 @@ class EventStoreRequestor(object):
 
 
 class HttpRequestor(EventStoreRequestor):
+    _accepts_payload_cache = True
+
     def __init__(self, options=None, **kwargs):
         if not options:
             self._options = HttpOptions()
@@ -129,42 +432,141 @@ class HttpRequestor(EventStoreRequestor):
             raise_with_traceback(TypeError('options must implement base.HttpOptions'))
         else:
             self._options = options
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._session_last_used = 0.0
+        self._session_in_flight = 0
+        if self._options.FRAGMENT_CACHE_SIZE:
+            self._fragment_cache = LRUCache(self._options.FRAGMENT_CACHE_SIZE)
+
+        self._spool = self._replayer = None
+        if self._options.SPOOL_DIRECTORY:
+            self._spool = Spool(
+                self._options.SPOOL_DIRECTORY,
+                segment_bytes=self._options.SPOOL_SEGMENT_BYTES,
+                max_bytes=self._options.SPOOL_MAX_BYTES)
+            self._replayer = SpoolReplayer(
+                self._spool,
+                lambda payload: self._deliver(payload, RetryPolicy()),
+                interval=self._options.SPOOL_REPLAY_INTERVAL)
+            self._replayer.start()
+
+    # the requestor keeps one long-lived session so that successive sends reuse
+    # pooled keep-alive connections to the endpoint; requests' connection pools
+    # are thread-safe, so the lock only guards building and evicting the session
+    def _build_session(self):
+        s = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self._options.POOL_CONNECTIONS,
+            pool_maxsize=self._options.POOL_MAXSIZE)
+        s.mount('http://', adapter)
+        s.mount('https://', adapter)
+        return s
+
+    @contextlib.contextmanager
+    def _pooled_session(self):
+        with self._session_lock:
+            now = time.time()
+            idle_timeout = self._options.POOL_IDLE_TIMEOUT / 1000.0
+            if (self._session and idle_timeout and not self._session_in_flight
+                    and (now - self._session_last_used) > idle_timeout):
+                self._session.close()
+                self._session = None
+            if not self._session:
+                self._session = self._build_session()
+            self._session_last_used = now
+            self._session_in_flight += 1
+            s = self._session
+        try:
+            yield s
+        finally:
+            with self._session_lock:
+                self._session_in_flight -= 1
+                self._session_last_used = time.time()
+
+    def close(self):
+        if self._replayer:
+            self._replayer.stop()
+            self._spool.close()
+        with self._session_lock:
+            if self._session:
+                self._session.close()
+                self._session = None
 
-    def _dispatch(self, caliper_objects=None, described_objects=None, sensor_id=None):
+    # post one serialized payload, retrying it as the retry policy allows; every
+    # attempt re-sends the same payload bytes
+    def _deliver(self, payload, policy):
+        headers = {
+            'Authorization': self._options.get_auth_header_value(),
+            'Content-Type': payload['type']
+        }
+        if payload.get('encoding'):
+            headers['Content-Encoding'] = payload['encoding']
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                with self._pooled_session() as s:
+                    r = s.post(
+                        self._options.HOST,
+                        data=payload['data'],
+                        headers=headers,
+                        timeout=(self._options.CONNECTION_TIMEOUT / 1000.0,
+                                 self._options.SOCKET_TIMEOUT / 1000.0))
+                status, retry_after = r.status_code, r.headers.get('Retry-After')
+            except requests.exceptions.RequestException as e:
+                logger.warning('Caliper envelope delivery failed: {0}'.format(e))
+                status, retry_after = None, None
+            if status in (requests.codes.ok, requests.codes.created):
+                return True
+            delay = policy.next_delay(attempt, status, started, retry_after=retry_after)
+            if delay is None:
+                return False
+            time.sleep(delay)
+            attempt += 1
+
+    def _dispatch(self,
+                  caliper_objects=None,
+                  described_objects=None,
+                  sensor_id=None,
+                  payload_cache=None):
         results = []
         identifiers = []
 
         if isinstance(caliper_objects, collections.MutableSequence):
-            s = requests.Session()
-            payload, ids = self._generate_payload(
-                caliper_objects=caliper_objects,
-                described_objects=described_objects,
-                optimize=self._options.OPTIMIZE_SERIALIZATION,
-                sensor_id=sensor_id)
-            r = s.post(
-                self._options.HOST,
-                data=payload['data'],
-                headers={
-                    'Authorization': self._options.get_auth_header_value(),
-                    'Content-Type': payload['type']
-                })
-            if ((r.status_code is requests.codes.ok) or (r.status_code is requests.codes.created)):
-                v = True
-                identifiers += ids
-            else:
-                v = False
-            results += len(caliper_objects) * [v]
-            s.close()
+            policy = RetryPolicy.from_options(self._options)
+            for payload, ids, count in self._payloads(caliper_objects, described_objects,
+                                                      sensor_id, payload_cache):
+                v = self._deliver(payload, policy)
+                if v:
+                    identifiers += ids
+                elif self._spool:
+                    self._spool.append(payload, count)
+                results += count * [v]
 
         return results, identifiers
 
-    def describe(self, caliper_entity_list=None, sensor_id=None):
-        results, ids = self._dispatch(caliper_objects=caliper_entity_list, sensor_id=sensor_id)
+    def describe(self, caliper_entity_list=None, sensor_id=None, payload_cache=None):
+        results, ids = self._dispatch(
+            caliper_objects=caliper_entity_list, sensor_id=sensor_id, payload_cache=payload_cache)
         return results, ids
 
-    def send(self, caliper_event_list=None, described_objects=None, sensor_id=None):
+    def send(self,
+             caliper_event_list=None,
+             described_objects=None,
+             sensor_id=None,
+             payload_cache=None):
         results, ids = self._dispatch(
             caliper_objects=caliper_event_list,
             described_objects=described_objects,
-            sensor_id=sensor_id)
+            sensor_id=sensor_id,
+            payload_cache=payload_cache)
         return results, ids
+
+    def spool(self, caliper_event_list=None, described_objects=None, sensor_id=None):
+        if not (self._spool and isinstance(caliper_event_list, collections.MutableSequence)):
+            return False
+        for payload, ids, count in self._payloads(caliper_event_list, described_objects,
+                                                  sensor_id):
+            self._spool.append(payload, count)
+        return True
@@ -24,17 +24,25 @@ install_aliases()
 from future.utils import raise_with_traceback
 from builtins import *
 
-import collections
+import collections, logging, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from caliper.base import Options, HttpOptions, deprecation, ensure_list_type
+from caliper.base import (Options, HttpOptions, _DescribedLookup, _described_set, deprecation,
+                          ensure_list_type, get_validation_level, validation_level)
+from caliper.breaker import CircuitBreaker
+from caliper.constants import VALIDATION_LEVELS
+from caliper.dispatch import BatchingDispatcher
 from caliper.entities import Entity
 from caliper.events import Event
-from caliper.request import EventStoreRequestor, HttpRequestor
+from caliper.request import EventStoreRequestor, HttpRequestor, PayloadCache
+from caliper.util.cache import ExpiringSet
 from caliper.util.stats import Statistics
 
+logger = logging.getLogger(__name__)
+
 
 class Client(object):
-    def __init__(self, config_options=None, requestor=None, stats=None, **kwargs):
+    def __init__(self, config_options=None, requestor=None, stats=None, fallback=None, **kwargs):
 
         if config_options is None:
             config_options=Options()
@@ -46,17 +54,49 @@ class Client(object):
         if requestor and not (isinstance(requestor, EventStoreRequestor)):
             raise_with_traceback(TypeError('requestor must implement request.EventStoreRequestor'))
         else:
-            self._requestor = HttpRequestor(options=self._config)
+            self._requestor = requestor or HttpRequestor(options=self._config)
+
+        if stats and not (isinstance(stats, Statistics)):
+            raise_with_traceback(TypeError('stats must implement stats.Statistics'))
+        else:
+            self._stats = stats or Statistics()
+
+        if fallback and not (isinstance(fallback, EventStoreRequestor)):
+            raise_with_traceback(TypeError('fallback must implement request.EventStoreRequestor'))
+        self._fallback = fallback
+
+        if self._config.CIRCUIT_BREAKER:
+            self._breaker = CircuitBreaker.from_options(
+                self._config, on_state_change=self._stats.update_circuit_state)
+            self._stats.update_circuit_state(self._breaker.state)
+        else:
+            self._breaker = None
+
+        if self._config.BUFFERED:
+            self._dispatcher = BatchingDispatcher(
+                self._deliver,
+                max_events=self._config.BATCH_MAX_EVENTS,
+                max_age=self._config.BATCH_MAX_AGE,
+                queue_size=self._config.BATCH_QUEUE_SIZE,
+                overflow=self._requestor.spool)
+        else:
+            self._dispatcher = None
 
-        if stats and not (isinstance(stats, Stats)):
-            raise_with_traceback(TypeError('stats must implement stats.Stats'))
+        if self._config.DESCRIBED_REGISTRY_SIZE:
+            self._described = ExpiringSet(
+                maxsize=self._config.DESCRIBED_REGISTRY_SIZE,
+                ttl=self._config.DESCRIBED_REGISTRY_TTL)
         else:
-            self._stats = Statistics()
+            self._described = None
 
     @property
     def config(self):
         return self._config
 
+    @property
+    def described(self):
+        return self._described
+
     @property
     def stats(self):
         return self._stats
@@ -77,29 +117,134 @@ class Client(object):
                 self._stats.update_failed(1)
             update_func(1)
 
+    # while the circuit breaker is open, calls go to the fallback requestor if
+    # there is one, and otherwise fail at once without touching the endpoint;
+    # the payload cache goes only to a requestor that says it takes one
+    def _request(self, method, objects, payload_cache=None, **kwargs):
+        breaker = self._breaker
+        if breaker and not breaker.allow():
+            self._stats.update_rejected(len(objects))
+            if self._fallback:
+                return getattr(self._fallback, method)(**kwargs)
+            return len(objects) * [False], []
+
+        if payload_cache and self._requestor._accepts_payload_cache:
+            kwargs['payload_cache'] = payload_cache
+        started = time.time()
+        try:
+            results, identifiers = getattr(self._requestor, method)(**kwargs)
+        except Exception:
+            if breaker:
+                breaker.record(False, time.time() - started)
+            raise
+        if breaker:
+            breaker.record(all(results), time.time() - started)
+        return results, identifiers
+
+    # identifiers the endpoint has accepted are remembered, so that later
+    # envelopes can carry those entities as bare identifiers
+    def _remember(self, identifiers):
+        if self._described is not None and identifiers:
+            self._described.update(identifiers)
+
+    # the registry is looked up beside the caller's described objects, and only
+    # once it holds anything, so that until then sends can share serializations
+    def _described_objects(self, described_objects):
+        if self._described is None or not len(self._described):
+            return described_objects
+        return _DescribedLookup(_described_set(described_objects), self._described)
+
+    # with a payload cache, the objects are checked and serialized once for all
+    # the clients sharing the cache. The checks run at the client's validation
+    # level, if it has one: at the boundary level, sending is where objects get
+    # validated, and a strict client validates objects built short of strict
+    def _ensure_list_type(self, objects, cls, payload_cache):
+        built_at = get_validation_level()
+        level = self._config.VALIDATION_LEVEL or built_at
+        validate = (level == VALIDATION_LEVELS['BOUNDARY'] or
+                    (level == VALIDATION_LEVELS['STRICT'] and
+                     built_at != VALIDATION_LEVELS['STRICT']))
+        with validation_level(level):
+            if payload_cache:
+                return payload_cache.ensure_list_type(objects, cls, validate=validate)
+            return ensure_list_type(objects, cls, validate=validate)
+
     def describe(self, entities=None, sensor_id=None):
+        return self._describe(entities, sensor_id=sensor_id)
+
+    # the sensor's way in to describe() and send(), with a payload cache shared
+    # among its clients
+    def _describe(self, entities, sensor_id=None, payload_cache=None):
         identifiers = None
-        if ensure_list_type(entities, Entity):
-            results, identifiers = self._requestor.describe(
-                caliper_entity_list=entities, sensor_id=sensor_id)
+        if self._ensure_list_type(entities, Entity, payload_cache):
+            results, identifiers = self._request(
+                'describe',
+                entities,
+                payload_cache=payload_cache,
+                caliper_entity_list=entities,
+                sensor_id=sensor_id)
             self._process_results(results, self.stats.update_describes)
+            self._remember(identifiers)
         return identifiers
 
+    def _deliver(self, events=None, described_objects=None, sensor_id=None, payload_cache=None):
+        results, identifiers = self._request(
+            'send',
+            events,
+            payload_cache=payload_cache,
+            caliper_event_list=events,
+            described_objects=self._described_objects(described_objects),
+            sensor_id=sensor_id)
+        self._process_results(results, self.stats.update_measures)
+        self._remember(identifiers)
+        return identifiers
+
+    # in buffered mode, send returns a future resolving to the identifiers
+    # of the envelope the events were eventually delivered in
     def send(self, events=None, described_objects=None, sensor_id=None):
+        return self._send(events, described_objects=described_objects, sensor_id=sensor_id)
+
+    def _send(self, events, described_objects=None, sensor_id=None, payload_cache=None):
         identifiers = None
-        if ensure_list_type(events, Event):
-            results, identifiers = self._requestor.send(
-                caliper_event_list=events,
+        if self._ensure_list_type(events, Event, payload_cache):
+            if self._dispatcher:
+                return self._dispatcher.submit(
+                    events=events, described_objects=described_objects, sensor_id=sensor_id)
+            identifiers = self._deliver(
+                events=events,
                 described_objects=described_objects,
-                sensor_id=sensor_id)
-            self._process_results(results, self.stats.update_measures)
+                sensor_id=sensor_id,
+                payload_cache=payload_cache)
         return identifiers
 
+    def flush(self):
+        if self._dispatcher:
+            self._dispatcher.flush()
+
+    # the requestor is closed once anything buffered has gone out, which stops
+    # its spool replay and releases its pooled connections
+    def close(self):
+        if self._dispatcher:
+            self._dispatcher.close()
+        close = getattr(self._requestor, 'close', None)
+        if close:
+            close()
+
 
+## Sensors send to all their registered clients concurrently, using a pool of at
+# most max_workers threads. When timeout is given, a send or describe returns
+# after that many milliseconds even if some clients have not finished; those
+# clients map to None in the returned identifier map, and finish in the background.
 class Sensor(object):
-    def __init__(self, sensor_id=None):
+    _client_class = Client
+
+    def __init__(self, sensor_id=None, max_workers=8, timeout=None):
         self._id = sensor_id
         self._clients = {}
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
     @staticmethod
     def fashion_default_sensor_with_client(client=None, sensor_id=None):
@@ -117,32 +262,82 @@ class Sensor(object):
         s.register_client('default', Client(config_options=config_options))
         return s
 
-    def describe(self, entities=None, entity=None):
+    def _get_executor(self):
+        with self._executor_lock:
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+            return self._executor
+
+    # clients share the payload cache, except those overriding send() or
+    # describe() themselves, which are called just as they always were
+    def _call_client(self, client, method, payload_cache, **kwargs):
+        if getattr(type(client), method) == getattr(self._client_class, method):
+            return getattr(client, '_' + method)(payload_cache=payload_cache, **kwargs)
+        return getattr(client, method)(**kwargs)
+
+    def _fan_out(self, call):
+        clients = list(self.client_registry.items())
+        # a lone client gains nothing from the pool, so call it on this thread
+        if len(clients) == 1 and not self._timeout:
+            k, client = clients[0]
+            return {k: call(client)}
+
+        # the pool's threads don't see a validation level set on this thread,
+        # so the calls are made at the level in force here
+        level = get_validation_level()
+
+        def call_at_level(client):
+            with validation_level(level):
+                return call(client)
+
+        executor = self._get_executor()
+        futures = [(k, executor.submit(call_at_level, client)) for k, client in clients]
+        timeout = self._timeout / 1000.0 if self._timeout else None
+        wait([f for k, f in futures], timeout=timeout)
+
         identifiers = {}
+        for k, f in futures:
+            if f.done():
+                identifiers.update({k: f.result()})
+            else:
+                logger.warning('Caliper client {0} missed the sensor deadline'.format(k))
+                identifiers.update({k: None})
+        return identifiers
+
+    def describe(self, entities=None, entity=None):
         v = entities
         if entity and not entities:
             deprecation('Sensor.describe(e) deprecated; use Sensor.describe(entities=e).')
             v = entity
         if not isinstance(v, collections.MutableSequence):
             v = [v]
-        for k, client in self.client_registry.items():
-            identifiers.update({k: client.describe(entities=v, sensor_id=self.id)})
-        return identifiers
+        cache = PayloadCache()
+        return self._fan_out(lambda client: self._call_client(
+            client, 'describe', cache, entities=v, sensor_id=self.id))
 
     def send(self, events=None, event=None, described_objects=None):
-        identifiers = {}
         v = events
         if event and not events:
             deprecation('Sensor.send(event=e) deprecated; use Sensor.send(events=e).')
             v = event
         if not isinstance(v, collections.MutableSequence):
             v = [v]
-        for k, client in self.client_registry.items():
-            identifiers.update({
-                k: client.send(
-                    events=v, described_objects=described_objects, sensor_id=self.id)
-            })
-        return identifiers
+        cache = PayloadCache()
+        return self._fan_out(lambda client: self._call_client(
+            client, 'send', cache, events=v, described_objects=described_objects,
+            sensor_id=self.id))
+
+    def flush(self):
+        for client in self.client_registry.values():
+            client.flush()
+
+    def close(self):
+        for client in self.client_registry.values():
+            client.close()
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
 
     def describe_batch(self, entity_list=None):
         deprecation(
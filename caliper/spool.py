@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, spool module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from builtins import *
+
+import logging, mmap, os, struct, threading, zlib
+
+from caliper.constants import PAYLOAD_COMPRESSION
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_SUFFIX = '.seg'
+_ACK_SUFFIX = '.ack'
+
+# record layout: magic, content encoding, event count, body length, body crc32
+_MAGIC = b'CSPL'
+_HEADER = struct.Struct(str('>4sBIII'))
+_ENCODINGS = [None, PAYLOAD_COMPRESSION['GZIP'], PAYLOAD_COMPRESSION['DEFLATE']]
+
+
+## Append-only write-ahead log of serialized envelopes that could not be delivered.
+# Records go into numbered segment files that rotate at segment_bytes; when the
+# spool as a whole grows past max_bytes, its oldest segments are dropped. Each
+# segment has an .ack file beside it recording how far replay has got, so that
+# a restarted process resumes replay rather than re-sending the whole segment.
+class Spool(object):
+    def __init__(self, directory, segment_bytes=16777216, max_bytes=268435456):
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_path = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._segments = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.endswith(_SEGMENT_SUFFIX))
+        # segment sizes are kept as records are appended, rather than asking the
+        # file system for them on every append
+        self._sizes = dict((p, os.path.getsize(p)) for p in self._segments)
+        self._bytes = sum(self._sizes.values())
+        # segment numbers only go up, past any segment or stray .ack file left
+        # behind, so that a new segment never picks up an old segment's .ack
+        numbers = [
+            int(f.split('.')[0]) for f in os.listdir(directory)
+            if f.endswith((_SEGMENT_SUFFIX, _SEGMENT_SUFFIX + _ACK_SUFFIX))
+            and f.split('.')[0].isdigit()
+        ]
+        self._next_number = max(numbers) + 1 if numbers else 0
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _next_segment_path(self):
+        n = self._next_number
+        self._next_number += 1
+        return os.path.join(self._directory, '{0:020d}{1}'.format(n, _SEGMENT_SUFFIX))
+
+    def _close_writer(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+            self._writer_path = None
+
+    def _drop(self, path):
+        for p in (path, path + _ACK_SUFFIX):
+            if os.path.exists(p):
+                os.remove(p)
+        self._segments.remove(path)
+        self._bytes -= self._sizes.pop(path, 0)
+
+    def append(self, payload, count):
+        body = payload['data']
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        record = _HEADER.pack(_MAGIC, _ENCODINGS.index(payload.get('encoding')), count,
+                              len(body), zlib.crc32(body) & 0xffffffff) + body
+        with self._lock:
+            if self._writer and (self._writer.tell() + len(record) > self._segment_bytes):
+                self._close_writer()
+            if not self._writer:
+                self._writer_path = self._next_segment_path()
+                self._segments.append(self._writer_path)
+                self._sizes[self._writer_path] = 0
+                self._writer = open(self._writer_path, 'ab')
+            self._writer.write(record)
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._sizes[self._writer_path] += len(record)
+            self._bytes += len(record)
+
+            while self._bytes > self._max_bytes and self._segments[0] != self._writer_path:
+                logger.warning('Caliper spool over its size limit; dropping segment {0}'.format(
+                    self._segments[0]))
+                self._drop(self._segments[0])
+
+    # the segments that replay can read; the segment being written is closed off
+    # and handed over only once replay has caught up to it, so that an endpoint
+    # that stays down doesn't start a new segment every replay interval
+    def pending_segments(self):
+        with self._lock:
+            if self._segments == [self._writer_path]:
+                self._close_writer()
+            return [p for p in self._segments if p != self._writer_path]
+
+    def _acked(self, path):
+        try:
+            with open(path + _ACK_SUFFIX, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (IOError, OSError, ValueError):
+            return 0
+
+    # a segment dropped meanwhile, for being over the size limit, is not acked,
+    # so that no .ack file is left behind without its segment
+    def ack(self, path, offset):
+        with self._lock:
+            if path not in self._segments:
+                return
+            with open(path + _ACK_SUFFIX, 'w') as f:
+                f.write(str(offset))
+
+    def remove(self, path):
+        with self._lock:
+            if path in self._segments and path != self._writer_path:
+                self._drop(path)
+
+    # yields (end offset, payload, event count) for each unacknowledged record
+    # in a segment, stopping at the first truncated or corrupt record
+    def read(self, path):
+        if os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                offset = self._acked(path)
+                while offset + _HEADER.size <= len(m):
+                    magic, encoding, count, length, crc = _HEADER.unpack_from(m, offset)
+                    start = offset + _HEADER.size
+                    body = m[start:start + length]
+                    if magic != _MAGIC or len(body) != length or (zlib.crc32(body) &
+                                                                  0xffffffff) != crc:
+                        logger.warning('Caliper spool segment {0} is corrupt at offset {1}'.format(
+                            path, offset))
+                        return
+                    offset = start + length
+                    payload = {'type': 'application/json', 'data': bytes(body)}
+                    if _ENCODINGS[encoding]:
+                        payload['encoding'] = _ENCODINGS[encoding]
+                    yield offset, payload, count
+            finally:
+                m.close()
+
+    def close(self):
+        with self._lock:
+            self._close_writer()
+
+
+## Background worker that drains a spool through deliver(payload), which returns
+# True once the endpoint has accepted a payload; replay stops at the first failure
+# and is tried again every interval milliseconds
+class SpoolReplayer(object):
+    def __init__(self, spool, deliver, interval=5000):
+        self._spool = spool
+        self._deliver = deliver
+        self._interval = interval / 1000.0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='caliper-spool-replay')
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    # once the closed segments are drained, the segment being written is handed
+    # over too, so a replay that succeeds leaves nothing spooled
+    def replay(self):
+        segments = self._spool.pending_segments()
+        while segments:
+            for path in segments:
+                for offset, payload, count in self._spool.read(path):
+                    if self._stopping.is_set() or not self._deliver(payload):
+                        return False
+                    self._spool.ack(path, offset)
+                self._spool.remove(path)
+            segments = self._spool.pending_segments()
+        return True
+
+    def _run(self):
+        while not self._stopping.wait(self._interval):
+            try:
+                self.replay()
+            except Exception:
+                logger.exception('Caliper spool replay failed')
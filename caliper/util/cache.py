@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Caliper-python package, cache utilities module
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from builtins import *
+
+import collections, functools, threading, time
+
+
+## Thread-safe, bounded mapping that evicts its least recently used entries
+# once it holds maxsize of them, and counts the hits and misses on lookups
+class LRUCache(object):
+    def __init__(self, maxsize=128):
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self._misses += 1
+                return default
+            self._entries[key] = value
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+## Decorator caching the results of a function of one hashable argument in an
+# LRUCache of maxsize entries, which the decorated function exposes as its
+# cache attribute (for its hit and miss counts); results must not be None
+def memoize(maxsize=4096):
+    def decorate(func):
+        cache = LRUCache(maxsize)
+
+        @functools.wraps(func)
+        def wrapper(arg):
+            r = cache.get(arg)
+            if r is None:
+                r = func(arg)
+                cache.put(arg, r)
+            return r
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorate
+
+
+## Thread-safe, bounded set whose members expire ttl milliseconds after they're
+# added; adding a member that is already present doesn't extend its life, so
+# that members are let go at least once every ttl milliseconds. Once the set
+# holds maxsize members, adding another drops the oldest.
+class ExpiringSet(object):
+    def __init__(self, maxsize=10000, ttl=3600000):
+        self._maxsize = maxsize
+        self._ttl = ttl / 1000.0
+        self._lock = threading.Lock()
+        self._expiries = collections.OrderedDict()
+
+    # members all live for the same ttl and are kept in the order they were
+    # added, so the expired ones are always at the front
+    def _expire(self, now):
+        while self._expiries:
+            key, expiry = next(iter(self._expiries.items()))
+            if expiry > now:
+                break
+            del self._expiries[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            expiry = self._expiries.get(key)
+        return expiry is not None and expiry > time.time()
+
+    def __len__(self):
+        with self._lock:
+            self._expire(time.time())
+            return len(self._expiries)
+
+    def update(self, keys):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            for key in keys:
+                if key not in self._expiries:
+                    self._expiries[key] = now + self._ttl
+            while len(self._expiries) > self._maxsize:
+                self._expiries.popitem(last=False)
+
+    def add(self, key):
+        self.update([key])
+
+    def discard(self, key):
+        with self._lock:
+            self._expiries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._expiries.clear()
+
+    # the members as they stand now, as a frozenset
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.time())
+            return frozenset(self._expiries)
@@ -121,13 +121,15 @@ class Statistics(object):
         'MEASURE': 'Measure',
         'DESCRIBE': 'Describe',
         'SUCCESSFUL': 'Successful',
-        'FAILED': 'Failed'
+        'FAILED': 'Failed',
+        'REJECTED': 'Rejected'
     }
 
     def __init__(self):
         self._map = {}
         for k in self._keys:
             self._map.update({self._keys[k]: Statistic()})
+        self._circuit_state = None
 
     def __str__(self):
         r_top = '\n-------- Caliper Python Statistics --------\n'
@@ -135,6 +137,8 @@ class Statistics(object):
         r_bot = '-------------------------------------------\n'
         for k in self._keys:
             r_bod += '{0} : {1}\n'.format(self._keys[k], self._map[self._keys[k]].__str__())
+        if self._circuit_state:
+            r_bod += 'Circuit : {0}\n'.format(self._circuit_state)
         return '{0}{1}{2}'.format(r_top, r_bod, r_bot)
 
     def clear(self):
@@ -168,3 +172,18 @@ class Statistics(object):
 
     def update_failed(self, val):
         self._map[self._keys['FAILED']].update(val)
+
+    @property
+    def rejected(self):
+        return self._map[self._keys['REJECTED']]
+
+    def update_rejected(self, val):
+        self._map[self._keys['REJECTED']].update(val)
+
+    # state of the client's circuit breaker, or None when it has none
+    @property
+    def circuit_state(self):
+        return self._circuit_state
+
+    def update_circuit_state(self, state):
+        self._circuit_state = state
@@ -19,6 +19,13 @@ if sys.argv[-1] == 'publish':
 
 _packages = ['caliper', 'caliper.util']
 _test_requirements = ['pytest', 'pytest-cov', 'responses', 'tox']
+_extra_requirements = {
+    'cbor': ['cbor2'],
+    'msgpack': ['msgpack'],
+    'orjson': ['orjson; python_version >= "3.6"'],
+    'rapidjson': ['python-rapidjson; python_version >= "3.4"'],
+    'ujson': ['ujson'],
+}
 
 with open('requirements.txt', 'r', 'utf-8') as fd:
     _install_requirements = fd.read().splitlines()
@@ -47,6 +54,7 @@ setup(
     url='https://github.com/IMSGlobal/caliper-python',
     packages=_packages,
     install_requires=_install_requirements,
+    extras_require=_extra_requirements,
     tests_require=_test_requirements,
     license=_license,
     zip_safe=False,
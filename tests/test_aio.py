@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Caliper-python testing package (testing asyncio sensor behaviour)
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+import asyncio
+import json
+import unittest
+
+from .context import caliper
+from . import util
+import caliper.aio
+
+
+## Minimal HTTP endpoint that accepts every POST with 200 OK on keep-alive connections
+class StubEndpoint(object):
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b'\r\n', b''):
+                    break
+                k, _, v = h.decode('latin-1').partition(':')
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            self.requests.append((headers, body))
+            writer.write('HTTP/1.1 {0} OK\r\nContent-Length: 2\r\n\r\n{{}}'.format(
+                self.status).encode('latin-1'))
+            await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return 'http://127.0.0.1:{0}/events'.format(self.server.sockets[0].getsockname()[1])
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class TestCaliperAsyncSensor(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.iterations = 4
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    async def _build_sensor(self, endpoint, keys=('default', )):
+        options = util.get_testing_options()
+        options.HOST = await endpoint.start()
+        sensor = caliper.aio.AsyncSensor(sensor_id=util._SENSOR_ID)
+        for k in keys:
+            sensor.register_client(k, caliper.aio.AsyncClient(config_options=options))
+        return sensor
+
+    def testEventSend(self):
+        fixture = 'caliperEventBasicCreated'
+        endpoint = StubEndpoint()
+
+        async def go():
+            sensor = await self._build_sensor(endpoint)
+            for i in range(self.iterations):
+                await sensor.send(
+                    caliper.condensor.from_json_dict(json.loads(util.get_fixture(fixture))))
+            await sensor.close()
+            await endpoint.stop()
+            return sensor
+
+        sensor = self._run(go())
+        self.assertEqual(len(endpoint.requests), self.iterations)
+        self.assertEqual(endpoint.connections, 1)
+        for stats in sensor.statistics:
+            self.assertEqual(stats.measures.count, self.iterations)
+            self.assertEqual(stats.successful.count, self.iterations)
+            self.assertEqual(stats.failed.count, 0)
+
+    def testEntityDescribeFanOut(self):
+        fixture = 'caliperEntityPerson'
+        endpoint = StubEndpoint()
+
+        async def go():
+            sensor = await self._build_sensor(endpoint, keys=('warehouse', 'vendor'))
+            ret = await sensor.describe(
+                caliper.condensor.from_json_dict(json.loads(util.get_fixture(fixture))))
+            await sensor.close()
+            await endpoint.stop()
+            return ret
+
+        ret = self._run(go())
+        self.assertEqual(sorted(ret.keys()), ['vendor', 'warehouse'])
+        self.assertEqual(len(endpoint.requests), 2)
+
+    def testEventSendRejected(self):
+        fixture = 'caliperEventBasicCreated'
+        endpoint = StubEndpoint(status=500)
+
+        async def go():
+            sensor = await self._build_sensor(endpoint)
+            await sensor.send(
+                caliper.condensor.from_json_dict(json.loads(util.get_fixture(fixture))))
+            await sensor.close()
+            await endpoint.stop()
+            return sensor
+
+        sensor = self._run(go())
+        for stats in sensor.statistics:
+            self.assertEqual(stats.successful.count, 0)
+            self.assertEqual(stats.failed.count, 1)
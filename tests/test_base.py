@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+# Caliper-python testing package (testing base serialization behaviour)
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import with_metaclass
+from builtins import *
+
+import json
+import unittest
+
+from .context import caliper
+import caliper.condensor
+import caliper.util.cache
+
+
+class TestCaliperValidation(unittest.TestCase):
+    # test that the fast path and the full check agree
+    def testURIValidation(self):
+        for uri in [
+                'https://example.edu/users/554433', 'http://example.edu:8080/a/b',
+                'urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+                'https://example.edu/terms/201601/courses/7?page=1#top', 'urn:isbn:0451450523'
+        ]:
+            self.assertTrue(caliper.base.is_valid_URI(uri))
+        for uri in [None, '', 42, ['https://example.edu/users/554433']]:
+            self.assertFalse(caliper.base.is_valid_URI(uri))
+
+    def testURIFastPath(self):
+        for uri in [
+                'https://a:65535', 'https://a:99999999', 'https://a:', 'https://a..b/',
+                "https://example.edu/~x/!$&'()*+,=:@", 'http://example.edu/a%zz',
+                'https://example.edu/a b'
+        ]:
+            if caliper.base._URI_FAST_PATH.match(uri):
+                self.assertTrue(caliper.base._is_valid_URI_full(uri))
+        self.assertFalse(caliper.base.is_valid_URI('https://example.edu:99999999/users/1'))
+
+    def testDateTimeValidation(self):
+        for date in ['2016-11-15T10:15:00.000Z', '2016-11-15T10:15:00+05:30', '2016-02-29',
+                     '2016-W46-2']:
+            self.assertTrue(caliper.base.is_valid_date(date))
+        for date in ['2015-02-29T10:15:00.000Z', '2016-13-01', 'yesterday', None, '',
+                     '2016-11-15T10:15:00-00:00']:
+            self.assertFalse(caliper.base.is_valid_date(date))
+        for dur in ['PT2250S', 'P1Y2M3DT4H5M6.5S', 'P1W', 'P99999Y']:
+            self.assertTrue(caliper.base.is_valid_duration(dur))
+        for dur in ['P', 'PT', '2250S', None, 'P99999999999999999999Y', 'PT99999999999999999999S']:
+            self.assertFalse(caliper.base.is_valid_duration(dur))
+        for time in ['10:15:00.000Z', '10:15:00+00:00', '10:15:00-05:00']:
+            self.assertTrue(caliper.base.is_valid_time(time))
+        for time in ['25:15:00', '10:15:00-00:00', None]:
+            self.assertFalse(caliper.base.is_valid_time(time))
+
+    # test that whatever the fast paths accept, the full parser accepts too
+    def testDateTimeFastPaths(self):
+        for date in ['2016-11-15T10:15:00.000000Z', '9999-12-31T23:59:59+23:59', '2016-11-15']:
+            self.assertTrue(caliper.base._DATE_FAST_PATH.match(date))
+            self.assertTrue(caliper.base._is_valid_date_full(date))
+        for dur in ['P9999Y9999M9999DT9999H9999M9999.999999S', 'PT0S']:
+            self.assertTrue(caliper.base._DURATION_FAST_PATH.match(dur))
+            self.assertTrue(caliper.base._is_valid_duration_full(dur))
+
+    def testSubtypes(self):
+        self.assertTrue(caliper.base.is_subtype('Person', 'Agent'))
+        self.assertTrue(caliper.base.is_subtype(caliper.entities.Person, 'Entity'))
+        self.assertTrue(caliper.base.is_subtype('NavigationEvent', caliper.base.CaliperSerializable))
+        self.assertFalse(caliper.base.is_subtype('Person', 'Event'))
+        self.assertFalse(caliper.base.is_subtype(dict, 'Entity'))
+        self.assertRaises(ValueError, caliper.base.is_subtype, 'Badge', 'Entity')
+
+    def testURIValidationCached(self):
+        cache = caliper.base.is_valid_URI.cache
+        uri = 'https://example.edu/users/cached'
+        hits = cache.hits
+        caliper.base.is_valid_URI(uri)
+        caliper.base.is_valid_URI(uri)
+        self.assertEqual(cache.hits, hits + 1)
+
+
+class TestCaliperValidationLevels(unittest.TestCase):
+    def setUp(self):
+        self.levels = caliper.constants.VALIDATION_LEVELS
+        self.event = {
+            'id': 'urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            'type': 'Event',
+            'action': caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            'actor': {'id': 'https://example.edu/docs/2', 'type': 'Document'},
+            'object': {'id': 'https://example.edu/docs/1', 'type': 'Document'},
+            'eventTime': '2016-11-15T10:15:00.000Z'
+        }
+
+    def _build(self, **kwargs):
+        args = {
+            'id': 'urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            'actor': caliper.entities.Document(id='https://example.edu/docs/2'),
+            'action': caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            'object': caliper.entities.Document(id='https://example.edu/docs/1'),
+            'eventTime': '2016-11-15T10:15:00.000Z'
+        }
+        args.update(kwargs)
+        return caliper.events.Event(**args)
+
+    # test that trusted objects skip their checks until validated
+    def testTrusted(self):
+        self.assertRaises(TypeError, self._build)
+        with caliper.validation_level(self.levels['TRUSTED']):
+            event = self._build()
+            person = caliper.entities.Person(id='https://example.edu/users/1', dateCreated='soon')
+        self.assertEqual(caliper.base.get_validation_level(), self.levels['STRICT'])
+        self.assertRaises(TypeError, event.validate)
+        self.assertRaises(ValueError, person.validate)
+        self.assertTrue(self._build(actor=person).as_dict())
+        person._set_date_prop('dateCreated', None)
+        self.assertTrue(self._build(actor=person).validate())
+
+    # test that trusted events skip their action checks until validated
+    def testTrustedActions(self):
+        person = caliper.entities.Person(id='https://example.edu/users/1')
+        resource = caliper.entities.DigitalResource(id='https://example.edu/docs/1')
+        self.assertRaises(ValueError, self._build, action='Bogus')
+        with caliper.validation_level(self.levels['TRUSTED']):
+            event = self._build(action='Bogus')
+            view = caliper.events.ViewEvent(
+                actor=person, action='Bogus', object=resource,
+                eventTime='2016-11-15T10:15:00.000Z')
+        self.assertRaises(ValueError, event.validate)
+        self.assertRaises(ValueError, view.validate)
+
+    # test that at the boundary level only the condensor checks objects
+    def testBoundary(self):
+        with caliper.validation_level(self.levels['BOUNDARY']):
+            self._build()
+            self.assertRaises(TypeError, caliper.condensor.from_json_dict, self.event)
+        with caliper.validation_level(self.levels['TRUSTED']):
+            event = caliper.condensor.from_json_dict(self.event)
+        self.assertEqual(event.actor.type, 'Document')
+
+    def testProcessLevel(self):
+        self.assertRaises(ValueError, caliper.set_validation_level, 'lenient')
+        caliper.set_validation_level(self.levels['TRUSTED'])
+        try:
+            self._build()
+            with caliper.validation_level(self.levels['STRICT']):
+                self.assertRaises(TypeError, self._build)
+        finally:
+            caliper.set_validation_level(self.levels['STRICT'])
+
+
+class TestCaliperSerializationPlan(unittest.TestCase):
+    def setUp(self):
+        self.person = caliper.entities.Person(
+            id='https://example.edu/users/554433', extensions={'b': 1, 'a': []})
+
+    # test that the plan is built once, for the object's own class
+    def testPlanCachedOnClass(self):
+        self.person.as_json()
+        plan = caliper.entities.Person.__dict__.get('_serialization_plan')
+        self.assertIsNotNone(plan)
+        caliper.entities.Person(id='https://example.edu/users/1').as_json()
+        self.assertIs(caliper.entities.Person.__dict__.get('_serialization_plan'), plan)
+        self.assertNotIn('_serialization_plan', caliper.entities.Agent.__dict__)
+
+    # test that an object whose properties differ from its class's plan still
+    # serializes all of its properties, in sorted order
+    def testPlanMismatch(self):
+        self.person.as_json()
+        other = caliper.entities.Person(id='https://example.edu/users/1')
+        other._update_props('aardvark', 'first')
+        d = other.as_dict(thin_props=True)
+        self.assertEqual(list(d.keys()), ['@context'] + sorted(k for k in d if k != '@context'))
+        self.assertEqual(d['aardvark'], 'first')
+
+    # test that thinning drops only empty values, whatever their type
+    def testThinProps(self):
+        d = self.person.as_dict(thin_props=True)
+        self.assertEqual(d['extensions'], {'b': 1, 'a': []})
+        self.assertNotIn('name', d)
+        self.assertEqual(
+            self.person.as_json(thin_props=True), json.dumps(d, sort_keys=True))
+
+
+class TestCaliperContextStack(unittest.TestCase):
+    def setUp(self):
+        self.base = caliper.constants.CALIPER_VERSION
+        self.extended = ['https://example.edu/ctx/extension.jsonld', self.base]
+        self.person = caliper.entities.Person(
+            id='https://example.edu/users/554433', context=list(self.extended))
+        self.assessment = caliper.entities.Assessment(
+            id='https://example.edu/terms/201601/courses/7/sections/1/assess/1',
+            creators=[self.person],
+            items=[
+                caliper.entities.AssessmentItem(
+                    id='https://example.edu/terms/201601/courses/7/sections/1/assess/1/items/{0}'.
+                    format(i),
+                    isPartOf=caliper.entities.Assessment(
+                        id='https://example.edu/terms/201601/courses/7/sections/1/assess/1'))
+                for i in range(3)
+            ])
+
+    # test that only contexts differing from the ones in force are kept
+    def testThinContext(self):
+        d = self.assessment.as_dict(thin_context=True, thin_props=True)
+        self.assertEqual(d['@context'], self.base)
+        self.assertEqual(d['creators'][0]['@context'], self.extended)
+        for item in d['items']:
+            self.assertNotIn('@context', item)
+            self.assertNotIn('@context', item['isPartOf'])
+
+    # test that equal list contexts are thinned, though they're different lists
+    def testThinEqualListContexts(self):
+        document = caliper.entities.Document(
+            id='https://example.edu/docs/1', creators=[self.person], context=list(self.extended))
+        d = document.as_dict(thin_context=True, thin_props=True)
+        self.assertEqual(d['@context'], self.extended)
+        self.assertNotIn('@context', d['creators'][0])
+        buf = bytearray()
+        document.write_json(buf, thin_context=True, thin_props=True)
+        self.assertEqual(buf.decode('utf-8'), json.dumps(d, sort_keys=True))
+
+
+class TestCaliperDescribedIndex(unittest.TestCase):
+    def setUp(self):
+        self.person = caliper.entities.Person(id='https://example.edu/users/554433')
+        self.event = caliper.events.Event(
+            id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            actor=self.person,
+            action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            object=caliper.entities.Document(id='https://example.edu/docs/1'),
+            eventTime='2016-11-15T10:15:00.000Z')
+
+    # test that an index thins the same objects as a list of the same ids
+    def testIndexMatchesList(self):
+        described = [self.person.id, 'https://example.edu/docs/2']
+        index = caliper.DescribedIndex(described)
+        self.assertEqual(self.event.as_json(described_objects=index),
+                         self.event.as_json(described_objects=described))
+        self.assertEqual(self.event.as_dict(described_objects=index)['actor'], self.person.id)
+
+    def testIndexUpdates(self):
+        index = caliper.DescribedIndex()
+        ids = index.ids
+        index.add(self.person.id)
+        self.assertEqual(ids, frozenset())
+        self.assertIn(self.person.id, index)
+        self.assertEqual(self.event.as_dict(described_objects=index)['actor'], self.person.id)
+        index.discard(self.person.id)
+        self.assertIsInstance(self.event.as_dict(described_objects=index)['actor'], dict)
+
+
+class TestCaliperIdCollection(unittest.TestCase):
+    def setUp(self):
+        self.person = caliper.entities.Person(
+            id='https://example.edu/users/554433',
+            extensions={'badge': {'id': 'https://example.edu/badges/"gold"', 'type': 'Badge'}})
+        self.event = caliper.events.Event(
+            id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            actor=self.person,
+            action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            object=caliper.entities.Document(id='https://example.edu/docs/1'),
+            eventTime='2016-11-15T10:15:00.000Z')
+
+    # test that identifiers come in the order they appear in the JSON
+    def testIdsInOrder(self):
+        ret, ids = self.event.as_json_with_ids(thin_context=True, thin_props=True)
+        self.assertEqual(ids, [
+            'https://example.edu/badges/"gold"', 'https://example.edu/users/554433',
+            'urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c', 'https://example.edu/docs/1'
+        ])
+        self.assertEqual(
+            self.event.as_json_with_ids(described_objects=[self.person.id])[1],
+            ['urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c', 'https://example.edu/docs/1'])
+
+    def testIdsSplit(self):
+        ret, (event_ids, entity_ids) = self.event.as_json_with_ids(split_ids=True)
+        self.assertEqual(event_ids, [self.event.id])
+        self.assertEqual(len(entity_ids), 3)
+
+
+class TestCaliperFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.person = caliper.entities.Person(id='https://example.edu/users/554433')
+        self.events = [
+            caliper.events.Event(
+                id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f{0:02d}'.format(i),
+                actor=self.person,
+                action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+                object=caliper.entities.Document(id='https://example.edu/docs/{0}'.format(i)),
+                eventTime='2016-11-15T10:15:00.000Z') for i in range(3)
+        ]
+        self.envelope = caliper.request.Envelope(
+            data=self.events, send_time='2016-11-15T11:05:01.000Z', sensor_id='https://example.edu/sensors/1')
+        self.cache = caliper.util.cache.LRUCache(16)
+
+    def _chunks(self, fragment_cache=None, described_objects=None):
+        return self.envelope.as_json_chunks_with_ids(
+            thin_context=True, thin_props=True, described_objects=described_objects,
+            fragment_cache=fragment_cache)
+
+    # test that shared entities are serialized once and reused
+    def testFragmentsReused(self):
+        expected = self._chunks()
+        self.assertEqual(self._chunks(self.cache), expected)
+        self.assertEqual(self._chunks(self.cache), expected)
+        self.assertTrue(self.cache.hits >= 2 * len(self.events))
+
+    # test that a property setter invalidates the cached fragment
+    def testFragmentInvalidated(self):
+        self._chunks(self.cache)
+        self.person._set_str_prop('name', 'Changed Name')
+        chunks = self._chunks(self.cache)
+        self.assertEqual(chunks, self._chunks())
+        self.assertIn('Changed Name', chunks[0][0])
+
+    # test that fragments depending on described objects aren't cached
+    def testFragmentsSkippedWithDescribedObjects(self):
+        described = [self.person.id]
+        self.assertEqual(self._chunks(self.cache, described), self._chunks(None, described))
+        self.assertEqual(len(self.cache), 0)
+
+    def testLRUEviction(self):
+        cache = caliper.util.cache.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Caliper-python testing package (testing circuit breaker behaviour)
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import with_metaclass
+from builtins import *
+
+import time
+import unittest
+
+from .context import caliper
+from . import util
+
+from caliper.constants import CIRCUIT_STATE
+
+
+class StubRequestor(caliper.request.EventStoreRequestor):
+    def __init__(self, succeed=True):
+        self.succeed = succeed
+        self.calls = 0
+
+    def describe(self, caliper_entity_list=None, sensor_id=None):
+        self.calls += 1
+        return len(caliper_entity_list) * [self.succeed], []
+
+
+class TestCaliperCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.transitions = []
+        self.breaker = caliper.breaker.CircuitBreaker(
+            failure_rate=50,
+            window=4,
+            min_calls=4,
+            open_duration=50,
+            on_state_change=self.transitions.append)
+
+    def _trip(self):
+        for v in [True, False, True, False]:
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record(v)
+
+    def testOpensAtFailureRate(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, CIRCUIT_STATE['CLOSED'])
+        self.breaker.record(True)
+        self.breaker.record(True)
+        self.assertEqual(self.breaker.state, CIRCUIT_STATE['OPEN'])
+        self.assertFalse(self.breaker.allow())
+
+    def testSlowCallsCountAsFailures(self):
+        breaker = caliper.breaker.CircuitBreaker(window=2, min_calls=2, slow_call_duration=100)
+        breaker.record(True, 0.5)
+        breaker.record(True, 0.5)
+        self.assertEqual(breaker.state, CIRCUIT_STATE['OPEN'])
+
+    def testHalfOpenCloses(self):
+        self._trip()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.transitions,
+                         [CIRCUIT_STATE['OPEN'], CIRCUIT_STATE['HALF_OPEN'], CIRCUIT_STATE['CLOSED']])
+
+    def testHalfOpenReopens(self):
+        self._trip()
+        time.sleep(0.06)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, CIRCUIT_STATE['OPEN'])
+        self.assertFalse(self.breaker.allow())
+
+
+class TestCaliperClientCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.options = util.get_testing_options()
+        self.options.CIRCUIT_BREAKER = True
+        self.options.CIRCUIT_WINDOW = 2
+        self.options.CIRCUIT_MIN_CALLS = 2
+        self.entities = [caliper.entities.Person(id='https://example.edu/users/554433')]
+
+    def testFailFastWhileOpen(self):
+        requestor = StubRequestor(succeed=False)
+        client = caliper.sensor.Client(config_options=self.options, requestor=requestor)
+        self.assertEqual(client.stats.circuit_state, CIRCUIT_STATE['CLOSED'])
+        for i in range(4):
+            client.describe(entities=self.entities)
+        self.assertEqual(requestor.calls, 2)
+        self.assertEqual(client.stats.circuit_state, CIRCUIT_STATE['OPEN'])
+        self.assertEqual(client.stats.rejected.count, 2)
+        self.assertEqual(client.stats.failed.count, 4)
+
+    def testFallbackWhileOpen(self):
+        requestor = StubRequestor(succeed=False)
+        fallback = StubRequestor()
+        client = caliper.sensor.Client(
+            config_options=self.options, requestor=requestor, fallback=fallback)
+        for i in range(3):
+            client.describe(entities=self.entities)
+        self.assertEqual(fallback.calls, 1)
+        self.assertEqual(client.stats.successful.count, 1)
@@ -24,6 +24,7 @@ install_aliases()
 from future.utils import with_metaclass
 from builtins import *
 
+import json
 import os
 import sys
 import unittest
@@ -53,3 +54,20 @@ class TestCaliperCondensor(unittest.TestCase):
     def testEnvelopeEventSingle(self):
         fixture = 'caliperEnvelopeEventSingle'
         self.assertEqual(util.get_fixture(fixture), util.rebuild_envelope(fixture))
+
+    # test that binary round trips give the same object graphs as JSON ones
+    def _rebuild_binary(self, fixture, binary_format):
+        o = caliper.condensor.from_json_dict(json.loads(util.get_fixture(fixture)))
+        b = getattr(o, 'as_{0}'.format(binary_format))(thin_props=True, thin_context=True)
+        rebuilt = getattr(caliper.condensor, 'from_{0}'.format(binary_format))(b)
+        return rebuilt.as_json(thin_props=True, thin_context=True)
+
+    @unittest.skipUnless(caliper.binaryformat.MsgpackFormat.available(), 'msgpack not installed')
+    def testMsgpackRoundTrip(self):
+        fixture = 'caliperEventAssessmentStarted'
+        self.assertEqual(util.rebuild_event(fixture), self._rebuild_binary(fixture, 'msgpack'))
+
+    @unittest.skipUnless(caliper.binaryformat.CborFormat.available(), 'cbor2 not installed')
+    def testCborRoundTrip(self):
+        fixture = 'caliperEventAssessmentStarted'
+        self.assertEqual(util.rebuild_event(fixture), self._rebuild_binary(fixture, 'cbor'))
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# Caliper-python testing package (testing requestor behaviour)
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import with_metaclass
+from builtins import *
+
+import contextlib
+import json
+import os
+import requests
+import sys
+import time
+import unittest
+import zlib
+
+from .context import caliper
+from . import util
+
+
+## Stands in for a requests session, answering posts with canned status codes, or
+# raising the canned exceptions
+class FakeResponse(object):
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.bodies.append(data)
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+class TestCaliperHttpRequestor(unittest.TestCase):
+    def setUp(self):
+        self.options = util.get_testing_options()
+        self.requestor = caliper.request.HttpRequestor(options=self.options)
+
+    def tearDown(self):
+        self.requestor.close()
+        del (self.requestor)
+
+    # test that successive dispatches share one pooled session
+    def testSessionReuse(self):
+        with self.requestor._pooled_session() as first:
+            pass
+        with self.requestor._pooled_session() as second:
+            pass
+        self.assertIs(first, second)
+
+    def testSessionIdleEviction(self):
+        self.options.POOL_IDLE_TIMEOUT = 1
+        with self.requestor._pooled_session() as first:
+            pass
+        self.requestor._session_last_used -= 1
+        with self.requestor._pooled_session() as second:
+            pass
+        self.assertIsNot(first, second)
+
+    def testSessionNotEvictedInFlight(self):
+        self.options.POOL_IDLE_TIMEOUT = 1
+        with self.requestor._pooled_session() as first:
+            self.requestor._session_last_used -= 1
+            with self.requestor._pooled_session() as second:
+                pass
+        self.assertIs(first, second)
+
+    # test payload compression settings
+    def testCompressionGzip(self):
+        payload = {'type': 'application/json', 'data': '{"data": []}' * 64}
+        r = self.requestor._compress_payload(payload, compression='gzip', threshold=16)
+        self.assertEqual(r['encoding'], 'gzip')
+        self.assertEqual(
+            zlib.decompress(r['data'], 16 + zlib.MAX_WBITS).decode('utf-8'), payload['data'])
+
+    def testCompressionDeflate(self):
+        payload = {'type': 'application/json', 'data': '{"data": []}' * 64}
+        r = self.requestor._compress_payload(payload, compression='deflate', threshold=16)
+        self.assertEqual(r['encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(r['data']).decode('utf-8'), payload['data'])
+
+    def testCompressionBelowThreshold(self):
+        payload = {'type': 'application/json', 'data': '{"data": []}'}
+        r = self.requestor._compress_payload(payload, compression='gzip', threshold=1024)
+        self.assertNotIn('encoding', r)
+        self.assertEqual(r['data'], payload['data'].encode('utf-8'))
+
+    # test splitting envelopes by size and count
+    def testEnvelopeChunksUnlimited(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(util.build_default_sensor(), fixture)
+        chunks = envelope.as_json_chunks_with_ids(thin_props=True, thin_context=True)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0][0], envelope.as_json(thin_props=True, thin_context=True))
+        self.assertEqual(chunks[0][2], len(envelope.data))
+
+    def testEnvelopeChunksByCount(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(util.build_default_sensor(), fixture)
+        chunks = envelope.as_json_chunks_with_ids(max_items=1, thin_props=True, thin_context=True)
+        self.assertEqual(len(chunks), len(envelope.data))
+        for payload, ids, count in chunks:
+            self.assertEqual(len(json.loads(payload)['data']), count)
+
+    def testEnvelopeChunksBySize(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(util.build_default_sensor(), fixture)
+        whole = envelope.as_json(thin_props=True, thin_context=True)
+        limit = len(whole) // 2
+        chunks = envelope.as_json_chunks_with_ids(
+            max_bytes=limit, thin_props=True, thin_context=True)
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(sum(count for payload, ids, count in chunks), len(envelope.data))
+        for payload, ids, count in chunks:
+            self.assertTrue(len(payload) <= limit or count == 1)
+
+    # test that the size limit counts bytes, whether or not the backend escapes
+    # non-ASCII characters
+    def testEnvelopeChunksNonAscii(self):
+        envelope = caliper.request.Envelope(
+            data=[
+                caliper.entities.Person(
+                    id='https://example.edu/users/{0}'.format(i), name='\u00e9' * 200)
+                for i in range(20)
+            ],
+            send_time='2016-11-15T11:05:01.000Z',
+            sensor_id='https://example.edu/sensors/1')
+        for backend in caliper.constants.JSON_BACKENDS.values():
+            chunks = envelope.as_json_chunks_with_ids(
+                max_bytes=1000, thin_props=True, thin_context=True, json_backend=backend)
+            self.assertTrue(len(chunks) > 1)
+            self.assertEqual(sum(count for payload, ids, count in chunks), len(envelope.data))
+            for payload, ids, count in chunks:
+                self.assertTrue(len(payload.encode('utf-8')) <= 1000 or count == 1)
+
+    # test that every JSON backend produces the same envelope content and ids
+    def testEnvelopeChunksJsonBackends(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(util.build_default_sensor(), fixture)
+        expected = envelope.as_json_with_ids(thin_props=True, thin_context=True)
+        for backend in caliper.constants.JSON_BACKENDS.values():
+            chunks = envelope.as_json_chunks_with_ids(
+                thin_props=True, thin_context=True, json_backend=backend)
+            self.assertEqual(json.loads(chunks[0][0]), json.loads(expected[0]))
+            self.assertEqual(chunks[0][1], expected[1])
+            self.assertEqual(
+                caliper.condensor.from_json(chunks[0][0], json_backend=backend)[0].as_json(),
+                envelope.data[0].as_json())
+
+    # test compact, unsorted chunks against the canonical form
+    def testEnvelopeChunksCompact(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(util.build_default_sensor(), fixture)
+        expected = envelope.as_json_with_ids(thin_props=True, thin_context=True)
+        chunks = envelope.as_json_chunks_with_ids(
+            thin_props=True, thin_context=True, json_backend='stdlib', compact=True,
+            sort_keys=False)
+        self.assertEqual(json.loads(chunks[0][0]), json.loads(expected[0]))
+        self.assertEqual(chunks[0][1], expected[1])
+        self.assertTrue(len(chunks[0][0]) < len(expected[0]))
+        self.assertEqual(
+            chunks[0][0],
+            envelope.as_json(thin_props=True, thin_context=True, compact=True, sort_keys=False))
+
+    # test that requestors with the same settings share one serialization
+    def testPayloadCacheShared(self):
+        calls = []
+        generate = self.requestor._generate_payloads
+
+        def counting(**kwargs):
+            calls.append(kwargs)
+            return generate(**kwargs)
+
+        self.requestor._generate_payloads = counting
+        other = caliper.request.HttpRequestor(options=self.options)
+        other._generate_payloads = counting
+        entities = [caliper.entities.Person(id='https://example.edu/users/554433')]
+        cache = caliper.request.PayloadCache()
+        first = self.requestor._payloads(entities, None, 'sensor', cache)
+        second = other._payloads(entities, None, 'sensor', cache)
+        self.assertEqual(len(calls), 1)
+        self.assertIs(first, second)
+        other.close()
+
+    # test delivery retries
+    def _fake_session(self, responses):
+        session = FakeSession(responses)
+
+        @contextlib.contextmanager
+        def pooled_session():
+            yield session
+
+        self.requestor._pooled_session = pooled_session
+        return session
+
+    def testRetryTransientFailure(self):
+        self.options.RETRY_LIMIT = 3
+        self.options.RETRY_BACKOFF = 1
+        session = self._fake_session([FakeResponse(503), FakeResponse(429), FakeResponse(200)])
+        payload = {'type': 'application/json', 'data': b'{"data": []}'}
+        policy = caliper.request.RetryPolicy.from_options(self.options)
+        self.assertTrue(self.requestor._deliver(payload, policy))
+        self.assertEqual(len(session.bodies), 3)
+        for body in session.bodies:
+            self.assertIs(body, payload['data'])
+
+    def testRetryRequestError(self):
+        self.options.RETRY_LIMIT = 3
+        self.options.RETRY_BACKOFF = 1
+        session = self._fake_session([
+            requests.exceptions.TooManyRedirects('redirected'),
+            requests.exceptions.ChunkedEncodingError('truncated'),
+            FakeResponse(200)
+        ])
+        payload = {'type': 'application/json', 'data': b'{"data": []}'}
+        policy = caliper.request.RetryPolicy.from_options(self.options)
+        self.assertTrue(self.requestor._deliver(payload, policy))
+        self.assertEqual(len(session.bodies), 3)
+
+    def testNoRetryClientError(self):
+        self.options.RETRY_LIMIT = 3
+        session = self._fake_session([FakeResponse(400), FakeResponse(200)])
+        payload = {'type': 'application/json', 'data': b'{"data": []}'}
+        policy = caliper.request.RetryPolicy.from_options(self.options)
+        self.assertFalse(self.requestor._deliver(payload, policy))
+        self.assertEqual(len(session.bodies), 1)
+
+    def testRetryLimit(self):
+        self.options.RETRY_LIMIT = 2
+        self.options.RETRY_BACKOFF = 1
+        session = self._fake_session([FakeResponse(500)] * 4)
+        payload = {'type': 'application/json', 'data': b'{"data": []}'}
+        policy = caliper.request.RetryPolicy.from_options(self.options)
+        self.assertFalse(self.requestor._deliver(payload, policy))
+        self.assertEqual(len(session.bodies), 3)
+
+    def testRetryAfterBeyondTimeLimit(self):
+        policy = caliper.request.RetryPolicy(limit=5, time_limit=1000)
+        self.assertEqual(policy.next_delay(0, 503, time.time(), retry_after='0'), 0.0)
+        self.assertIsNone(policy.next_delay(0, 503, time.time(), retry_after='120'))
+
+    def testRetryStatuses(self):
+        policy = caliper.request.RetryPolicy(limit=5)
+        for status in [None, 429, 500, 502, 503, 504]:
+            self.assertTrue(policy.is_retryable(status))
+        for status in [400, 404, 501, 505]:
+            self.assertFalse(policy.is_retryable(status))
+
+    def testRetryBackoffBounds(self):
+        policy = caliper.request.RetryPolicy(limit=10, backoff=100, backoff_max=400)
+        for attempt in range(10):
+            delay = policy.next_delay(attempt, 502, time.time())
+            self.assertTrue(0 <= delay <= min(0.4, 0.1 * 2**attempt))
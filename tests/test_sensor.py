@@ -26,13 +26,42 @@ from builtins import *
 
 import json
 import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import unittest
 
 from .context import caliper
 from . import util
 
 
+class SlowClient(caliper.sensor.Client):
+    def __init__(self, delay):
+        caliper.sensor.Client.__init__(self, config_options=util.get_testing_options())
+        self.delay = delay
+
+    def describe(self, entities=None, sensor_id=None):
+        time.sleep(self.delay)
+        return [e.id for e in entities]
+
+
+class RecordingRequestor(caliper.request.EventStoreRequestor):
+    def __init__(self):
+        self.payloads = []
+
+    def describe(self, caliper_entity_list=None, sensor_id=None):
+        return len(caliper_entity_list) * [True], [e.id for e in caliper_entity_list]
+
+    def send(self, caliper_event_list=None, described_objects=None, sensor_id=None):
+        self.payloads += [
+            e.as_dict(described_objects=described_objects, thin_props=True, thin_context=True)
+            for e in caliper_event_list
+        ]
+        return len(caliper_event_list) * [True], [e.id for e in caliper_event_list]
+
+
 class TestCaliperSensor(unittest.TestCase):
     def setUp(self):
         self.sensor = util.build_default_sensor()
@@ -70,6 +99,14 @@ class TestCaliperSensor(unittest.TestCase):
             envelope.as_json(
                 thin_props=True, thin_context=True), util.get_fixture(fixture))
 
+    # test that the streaming writer produces the same envelope as as_json
+    def testEventPayloadStreamed(self):
+        fixture = 'caliperEnvelopeEventBatch'
+        envelope = util.get_envelope(self.sensor, fixture)
+        buf = bytearray()
+        envelope.write_json(buf, thin_props=True, thin_context=True)
+        self.assertEqual(buf.decode('utf-8'), util.get_fixture(fixture))
+
     # test transmission stats for sensor.send()
     def testEventSend(self):
         fixture = 'caliperEventBasicCreated'
@@ -130,3 +167,189 @@ class TestCaliperSensor(unittest.TestCase):
             self.assertEqual(counted, self.iterations)
             self.assertEqual(succeeded, self.iterations)
             self.assertEqual(failed, 0)
+
+    # test buffered sends through the background dispatcher
+    def testEventSendBuffered(self):
+        fixture = 'caliperEventBasicCreated'
+        options = util.get_testing_options()
+        options.BUFFERED = True
+        sensor = caliper.build_sensor_from_config(config_options=options, sensor_id=self.sensor.id)
+        futures = [
+            sensor.send(caliper.condensor.from_json_dict(json.loads(util.get_fixture(fixture))))
+            for i in range(self.iterations)
+        ]
+        sensor.flush()
+        for f in futures:
+            self.assertTrue(f['default'].done())
+        for stats in sensor.statistics:
+            self.assertEqual(stats.measures.count, self.iterations)
+            self.assertEqual(stats.successful.count, self.iterations)
+            self.assertEqual(stats.failed.count, 0)
+        sensor.close()
+
+    # test that every send accepted by a dispatcher resolves, even when the
+    # dispatcher is closed while sends are still coming in
+    def testDispatcherCloseWhileSubmitting(self):
+        dispatcher = caliper.dispatch.BatchingDispatcher(
+            lambda events=None, **kwargs: events, max_events=10)
+        futures = []
+
+        def submit():
+            try:
+                while True:
+                    futures.append(dispatcher.submit(events=['a']))
+            except RuntimeError:
+                pass
+
+        threads = [threading.Thread(target=submit) for i in range(4)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        dispatcher.close()
+        for t in threads:
+            t.join()
+        for f in futures:
+            self.assertTrue(f.done())
+
+    # test that clients are described to concurrently, not one after another
+    def testFanOutConcurrent(self):
+        sensor = caliper.sensor.Sensor(sensor_id=self.sensor.id)
+        for k in ['warehouse', 'vendor', 'audit']:
+            sensor.register_client(k, SlowClient(0.2))
+        entity = caliper.entities.Person(id='https://example.edu/users/554433')
+        started = time.time()
+        ret = sensor.describe(entity)
+        self.assertTrue(time.time() - started < 0.5)
+        self.assertEqual(ret, {k: [entity.id] for k in ['warehouse', 'vendor', 'audit']})
+        sensor.close()
+
+    # test that clients missing the sensor deadline map to None
+    def testFanOutDeadline(self):
+        sensor = caliper.sensor.Sensor(sensor_id=self.sensor.id, timeout=100)
+        sensor.register_client('fast', SlowClient(0))
+        sensor.register_client('slow', SlowClient(0.5))
+        entity = caliper.entities.Person(id='https://example.edu/users/554433')
+        self.assertEqual(sensor.describe(entity), {'fast': [entity.id], 'slow': None})
+        sensor.close()
+
+    # test that entities the endpoint has accepted go out as bare identifiers
+    def testDescribedRegistry(self):
+        options = util.get_testing_options()
+        options.DESCRIBED_REGISTRY_SIZE = 10
+        requestor = RecordingRequestor()
+        client = caliper.sensor.Client(config_options=options, requestor=requestor)
+        actor = caliper.entities.Person(id='https://example.edu/users/554433')
+        event = caliper.events.Event(
+            id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            actor=actor,
+            action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            object=caliper.entities.DigitalResource(id='https://example.edu/resources/1'),
+            eventTime='2018-11-15T10:15:00.000Z')
+        client.send([event])
+        self.assertIsInstance(requestor.payloads[-1]['actor'], dict)
+        client.describe([actor])
+        self.assertIn(actor.id, client.described)
+        client.send([event])
+        self.assertEqual(requestor.payloads[-1]['actor'], actor.id)
+        self.assertIsInstance(requestor.payloads[-1]['object'], dict)
+
+    # test that closing a client stops its requestor's spool replay
+    def testCloseStopsSpoolReplay(self):
+        directory = tempfile.mkdtemp()
+        try:
+            options = util.get_testing_options()
+            options.SPOOL_DIRECTORY = directory
+            client = caliper.sensor.Client(config_options=options)
+            replayer = client._requestor._replayer
+            self.assertTrue(replayer._thread.is_alive())
+            client.close()
+            self.assertFalse(replayer._thread.is_alive())
+        finally:
+            shutil.rmtree(directory)
+
+    # test that the registry is looked up beside the caller's described objects,
+    # and left out while it's empty
+    def testDescribedRegistryLookup(self):
+        options = util.get_testing_options()
+        options.DESCRIBED_REGISTRY_SIZE = 10
+        client = caliper.sensor.Client(config_options=options, requestor=RecordingRequestor())
+        self.assertIsNone(client._described_objects(None))
+        actor = caliper.entities.Person(id='https://example.edu/users/554433')
+        client.describe([actor])
+        described = client._described_objects(['https://example.edu/resources/1'])
+        self.assertIn(actor.id, described)
+        self.assertIn('https://example.edu/resources/1', described)
+        self.assertNotIn('https://example.edu/resources/2', described)
+        self.assertEqual(described, client._described_objects(['https://example.edu/resources/1']))
+
+    # test that a sensor sends through requestors written to the plain
+    # describe/send signature, and through the fallback while the breaker is open
+    def testSensorCustomRequestor(self):
+        options = util.get_testing_options()
+        options.CIRCUIT_BREAKER = True
+        options.CIRCUIT_WINDOW = 2
+        options.CIRCUIT_MIN_CALLS = 2
+        requestor = RecordingRequestor()
+        fallback = RecordingRequestor()
+        sensor = caliper.sensor.Sensor(sensor_id=self.sensor.id)
+        sensor.register_client('default', caliper.sensor.Client(
+            config_options=options, requestor=requestor, fallback=fallback))
+        actor = caliper.entities.Person(id='https://example.edu/users/554433')
+        event = caliper.events.Event(
+            id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+            actor=actor,
+            action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+            object=caliper.entities.DigitalResource(id='https://example.edu/resources/1'),
+            eventTime='2018-11-15T10:15:00.000Z')
+        self.assertEqual(sensor.describe([actor]), {'default': [actor.id]})
+        self.assertEqual(sensor.send([event]), {'default': [event.id]})
+        self.assertEqual(len(requestor.payloads), 1)
+        breaker = sensor.client_registry['default']._breaker
+        breaker.record(False)
+        breaker.record(False)
+        self.assertEqual(sensor.send([event]), {'default': [event.id]})
+        self.assertEqual(len(fallback.payloads), 1)
+        sensor.close()
+
+    def testDescribedRegistryExpiry(self):
+        registry = caliper.util.cache.ExpiringSet(maxsize=2, ttl=50)
+        registry.update(['a', 'b', 'c'])
+        self.assertEqual(registry.snapshot(), frozenset(['b', 'c']))
+        time.sleep(0.06)
+        self.assertNotIn('b', registry)
+        self.assertEqual(len(registry), 0)
+
+    # test that a client at the boundary level validates what it sends
+    def testBoundaryValidation(self):
+        options = util.get_testing_options()
+        options.VALIDATION_LEVEL = caliper.constants.VALIDATION_LEVELS['BOUNDARY']
+        requestor = RecordingRequestor()
+        client = caliper.sensor.Client(config_options=options, requestor=requestor)
+        with caliper.validation_level(caliper.constants.VALIDATION_LEVELS['TRUSTED']):
+            event = caliper.events.Event(
+                id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+                actor=caliper.entities.DigitalResource(id='https://example.edu/resources/2'),
+                action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+                object=caliper.entities.DigitalResource(id='https://example.edu/resources/1'),
+                eventTime='2018-11-15T10:15:00.000Z')
+        self.assertRaises(TypeError, client.send, [event])
+        self.assertEqual(requestor.payloads, [])
+
+    # test that a strict client checks what it sends, whatever the level in force
+    def testStrictClientValidation(self):
+        levels = caliper.constants.VALIDATION_LEVELS
+        options = util.get_testing_options()
+        options.VALIDATION_LEVEL = levels['STRICT']
+        requestor = RecordingRequestor()
+        client = caliper.sensor.Client(config_options=options, requestor=requestor)
+        for level in [levels['BOUNDARY'], levels['TRUSTED']]:
+            with caliper.validation_level(level):
+                event = caliper.events.Event(
+                    id='urn:uuid:3a648e68-f00d-4c08-aa59-8738e1884f2c',
+                    actor=caliper.entities.DigitalResource(id='https://example.edu/resources/2'),
+                    action=caliper.constants.BASIC_EVENT_ACTIONS['CREATED'],
+                    object=caliper.entities.DigitalResource(id='https://example.edu/resources/1'),
+                    eventTime='2018-11-15T10:15:00.000Z')
+                self.assertRaises(TypeError, client.send, [event])
+                self.assertRaises(TypeError, client.send, ['not an event'])
+        self.assertEqual(requestor.payloads, [])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Caliper-python testing package (testing spool behaviour)
+#
+# This file is part of the IMS Caliper Analytics(tm) and is licensed to IMS
+# Global Learning Consortium, Inc. (http://www.imsglobal.org) under one or more
+# contributor license agreements. See the NOTICE file distributed with this
+# work for additional information.
+#
+# IMS Caliper is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, version 3 of the License.
+#
+# IMS Caliper is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program. If not, see http://www.gnu.org/licenses/.
+#
+from __future__ import (absolute_import, division, print_function, unicode_literals)
+from future.standard_library import install_aliases
+install_aliases()
+from future.utils import with_metaclass
+from builtins import *
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from .context import caliper
+import caliper.spool
+
+
+class TestCaliperSpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = caliper.spool.Spool(self.directory, segment_bytes=256, max_bytes=4096)
+
+    def tearDown(self):
+        self.spool.close()
+        shutil.rmtree(self.directory)
+
+    def _payload(self, i, encoding=None):
+        payload = {'type': 'application/json', 'data': '{{"data": [{0}]}}'.format(i).encode('utf-8')}
+        if encoding:
+            payload['encoding'] = encoding
+        return payload
+
+    # the segment being written is only handed to replay once replay has caught
+    # up to it, so it's closed off here to read everything spooled so far
+    def _replay(self):
+        self.spool.close()
+        r = []
+        for path in self.spool.pending_segments():
+            r += [payload for offset, payload, count in self.spool.read(path)]
+        return r
+
+    def testAppendAndRead(self):
+        self.spool.append(self._payload(1), 1)
+        self.spool.append(self._payload(2, encoding='gzip'), 3)
+        r = []
+        for path in self.spool.pending_segments():
+            r += [(payload, count) for offset, payload, count in self.spool.read(path)]
+        self.assertEqual(r, [(self._payload(1), 1), (self._payload(2, encoding='gzip'), 3)])
+
+    def testSegmentRotation(self):
+        for i in range(20):
+            self.spool.append(self._payload(i), 1)
+        self.assertTrue(len(self.spool.pending_segments()) > 1)
+        self.assertEqual(self._replay(), [self._payload(i) for i in range(20)])
+
+    def testSizeLimitDropsOldest(self):
+        for i in range(400):
+            self.spool.append(self._payload(i), 1)
+        r = self._replay()
+        self.assertTrue(len(r) < 400)
+        self.assertEqual(r[-1], self._payload(399))
+
+    # test that an endpoint that stays down doesn't start a segment per replay
+    def testActiveSegmentKeptUntilCaughtUp(self):
+        self.spool.append(self._payload(1), 1)
+        first = self.spool.pending_segments()
+        self.assertEqual(len(first), 1)
+        for i in range(2, 5):
+            self.spool.append(self._payload(i), 1)
+            self.assertEqual(self.spool.pending_segments(), first)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def testCorruptRecordStopsRead(self):
+        self.spool.append(self._payload(1), 1)
+        self.spool.append(self._payload(2), 1)
+        path = self.spool.pending_segments()[0]
+        with open(path, 'r+b') as f:
+            f.seek(-2, os.SEEK_END)
+            f.write(b'!!')
+        self.assertEqual(self._replay(), [self._payload(1)])
+
+    def testReplayResumesFromAck(self):
+        for i in range(3):
+            self.spool.append(self._payload(i), 1)
+        delivered = []
+
+        def deliver(payload):
+            if len(delivered) == 1:
+                delivered.append(None)
+                return False
+            delivered.append(payload)
+            return True
+
+        replayer = caliper.spool.SpoolReplayer(self.spool, deliver)
+        self.assertFalse(replayer.replay())
+        self.assertTrue(replayer.replay())
+        self.assertEqual([p for p in delivered if p], [self._payload(i) for i in range(3)])
+        self.assertEqual(self.spool.pending_segments(), [])
+
+    # test that a dropped segment isn't acked, and that its number isn't reused
+    # by a later segment, in this spool or one reopened on the same directory
+    def testDroppedSegmentNotAckedOrReused(self):
+        self.spool.append(self._payload(1), 1)
+        path = self.spool.pending_segments()[0]
+        self.spool.remove(path)
+        self.spool.ack(path, 10)
+        self.assertFalse(os.path.exists(path + '.ack'))
+        self.spool.append(self._payload(2), 1)
+        self.assertEqual(self._replay(), [self._payload(2)])
+        self.assertNotIn(path, self.spool.pending_segments())
+        with open(os.path.join(self.directory, '00000000000000000005.seg.ack'), 'w') as f:
+            f.write('10')
+        spool = caliper.spool.Spool(self.directory, segment_bytes=256, max_bytes=4096)
+        spool.append(self._payload(3), 1)
+        spool.close()
+        self.assertEqual(sorted(os.listdir(self.directory))[-1], '00000000000000000006.seg')